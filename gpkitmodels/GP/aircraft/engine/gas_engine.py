@@ -2,7 +2,7 @@
 from builtins import zip
 from gpkit import Model, Variable, units
 import os
-import pandas as pd
+from gpkitmodels.tools.fitdata import load_fitdata
 # from gpkitmodels.tools.fit_constraintset import FitCS
 from gpfit.fit_constraintset import FitCS
 
@@ -24,8 +24,7 @@ class Engine(Model):
                           "Max shaft power at sea level")
 
         path = os.path.dirname(__file__)
-        df = pd.read_csv(path + os.sep + "power_lawfit.csv").to_dict(
-            orient="records")[0]
+        df = load_fitdata(path + os.sep + "power_lawfit.csv")
 
         constraints = [
             FitCS(df, Weng/Wengref, [Pslmax/Pref]),
@@ -59,8 +58,7 @@ class EnginePerf(Model):
         mfac = Variable("m_{fac}", 1.0, "-", "BSFC margin factor")
 
         path = os.path.dirname(__file__)
-        df = pd.read_csv(path + os.sep + "powerBSFCfit.csv").to_dict(
-            orient="records")[0]
+        df = load_fitdata(path + os.sep + "powerBSFCfit.csv")
 
         constraints = [
             FitCS(df, bsfc/mfac/static["BSFC_{min}"], [Ptotal/Pshaftmax]),
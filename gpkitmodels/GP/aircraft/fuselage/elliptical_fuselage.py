@@ -1,7 +1,7 @@
 " elliptical fuselage.py "
 import numpy as np
 from gpkit import Variable, Model, parse_variables
-from gpkitmodels.GP.materials import cfrpfabric
+from gpkitmodels.GP.materials import SharedMaterial
 from gpkitmodels import g
 
 class FuselageAero(Model):
@@ -50,7 +50,7 @@ class Fuselage(Model):
     nply    2           [-]             number of plys
 
     """
-    material = cfrpfabric
+    material = SharedMaterial("cfrpfabric")
     flight_model = FuselageAero
 
     @parse_variables(__doc__, globals())
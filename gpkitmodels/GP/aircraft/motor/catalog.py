@@ -0,0 +1,171 @@
+" catalog of motors, screened before Propulsor solves "
+from __future__ import print_function
+from builtins import object
+import csv
+import multiprocessing
+import os
+import numpy as np
+
+#pylint: disable=invalid-name
+
+COLUMNS = ["Kv", "R", "i0", "Qmax", "V_max", "W"]
+RPM = np.pi/30  # rad/s
+LBM = 0.45359237  # kg
+
+class MotorCatalog(object):
+    """array-backed table of motors
+
+    Columns are Kv [rpm/V], R [ohms], i0 [amp], Qmax [N*m], V_max [V] and
+    W [lbf], in the units of Motor's variables. Entries are stored sorted
+    by Kv, with a second ordering by Qmax, so range queries on either are
+    binary searches.
+
+    The bundled motor_catalog.csv holds generic example motors named by
+    type, size and Kv, with representative values rather than any
+    manufacturer's data; read a csv of real datasheet values for design
+    work.
+    """
+    def __init__(self, names, columns):
+        order = np.argsort(columns["Kv"], kind="mergesort")
+        self.names = np.asarray(names)[order]
+        self.columns = dict((k, np.asarray(columns[k], float)[order])
+                            for k in COLUMNS)
+        self.by_Qmax = np.argsort(self.columns["Qmax"], kind="mergesort")
+
+    @classmethod
+    def read(cls, path=None):
+        "catalog from a csv with a name and each of COLUMNS"
+        if path is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "motor_catalog.csv")
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        return cls([r["name"] for r in rows],
+                   dict((k, [float(r[k]) for r in rows]) for k in COLUMNS))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        "{column: value} of entry i, with its name"
+        entry = dict((k, float(v[i])) for k, v in self.columns.items())
+        entry["name"] = str(self.names[i])
+        return entry
+
+    def entry(self, name):
+        "{column: value} of the entry called name"
+        matches = np.nonzero(self.names == name)[0]
+        if not len(matches):
+            raise KeyError(name)
+        return self[matches[0]]
+
+    def select(self, Kv=(0, np.inf), Qmax=(0, np.inf)):
+        "sorted indices of entries with Kv and Qmax in the closed ranges"
+        kv = self.columns["Kv"]
+        inKv = np.arange(np.searchsorted(kv, Kv[0], "left"),
+                         np.searchsorted(kv, Kv[1], "right"))
+        q = self.columns["Qmax"][self.by_Qmax]
+        inQmax = self.by_Qmax[np.searchsorted(q, Qmax[0], "left"):
+                              np.searchsorted(q, Qmax[1], "right")]
+        return np.intersect1d(inKv, inQmax)
+
+    def performance(self, Q, omega, indices=None):
+        """MotorPerf at operating points of torque Q [N*m] and rotation
+        rate omega [rpm], for every entry (or those in indices)
+
+        Returns a dict of (entries, points) arrays of current "i" [amp],
+        voltage "v" [V], "Pelec" [W] and "etam", with the tightest current
+        and voltage MotorPerf allows, and of "feasible" points (within
+        Qmax and V_max).
+        """
+        idx = slice(None) if indices is None else indices
+        c = dict((k, v[idx][:, None]) for k, v in self.columns.items())
+        Q, omega = np.asarray(Q, float), np.asarray(omega, float)
+        i = Q*c["Kv"]*RPM + c["i0"]
+        v = omega/c["Kv"] + i*c["R"]
+        Pelec = v*i
+        return {"i": i, "v": v, "Pelec": Pelec,
+                "etam": Q*omega*RPM/Pelec,
+                "feasible": (Q <= c["Qmax"]) & (v <= c["V_max"])}
+
+    def screen(self, Q, omega, n=None, indices=None):
+        """indices of the entries feasible at every operating point,
+        lowest mean electrical power first, at most n of them"""
+        indices = (np.arange(len(self)) if indices is None
+                   else np.asarray(indices))
+        perf = self.performance(Q, omega, indices)
+        ok = perf["feasible"].all(1)
+        ranked = indices[ok][np.argsort(perf["Pelec"][ok].mean(1))]
+        return ranked[:n]
+
+def motor_substitutions(motor, entry):
+    """substitutions fixing a Motor to a catalog entry, its weight matched
+    through the specific torque Qstar"""
+    return {motor.Kv: entry["Kv"], motor.Kv_min: entry["Kv"]/2.,
+            motor.Kv_max: entry["Kv"]*2., motor.R: entry["R"],
+            motor.i0: entry["i0"], motor.Qmax: entry["Qmax"],
+            motor.V_max: entry["V_max"],
+            motor.Qstar: entry["W"]*LBM/entry["Qmax"]}
+
+def _catalog_job(job):
+    "cost of build's model with a catalog motor, or None if it failed"
+    build, entry, kwargs = job
+    model, motor = build(entry)
+    model.substitutions.update(motor_substitutions(motor, entry))
+    try:
+        sol = model.solve(verbosity=0, **kwargs)
+    except (RuntimeWarning, ValueError):
+        return None
+    return float(getattr(sol["cost"], "magnitude", sol["cost"]))
+
+def catalog_solve(build, catalog, Q, omega, n=5, workers=None, verbosity=0,
+                  **kwargs):
+    """picks the best catalog motor for a model
+
+    Arguments
+    ---------
+    build: picklable callable
+        build(entry) returns (model, motor): the model with its cost set
+        and the Motor to fix to the catalog entry
+    catalog: MotorCatalog
+    Q, omega: arrays
+        required operating points, torque [N*m] and rotation rate [rpm],
+        for the vectorized prefilter
+    n: int
+        number of screened candidates given full solves
+    workers: int
+        size of the process pool; defaults to the number of cpus, 1 solves
+        the candidates serially in this process
+    kwargs:
+        passed to solve
+
+    Returns
+    -------
+    solution with the best motor, and a list of (name, cost) of the
+    candidates, best first; failed solves have cost None
+    """
+    candidates = catalog.screen(Q, omega, n)
+    if not len(candidates):
+        raise ValueError("no catalog motor is feasible at the operating "
+                         "points")
+    jobs = [(build, catalog[i], kwargs) for i in candidates]
+    if workers == 1:
+        costs = [_catalog_job(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            costs = pool.map(_catalog_job, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    ranking = sorted(zip([str(catalog.names[i]) for i in candidates], costs),
+                     key=lambda nc: np.inf if nc[1] is None else nc[1])
+    if verbosity > 0:
+        for name, cost in ranking:
+            print("%-24s %s" % (name, cost))
+    if ranking[0][1] is None:
+        raise RuntimeWarning("no screened catalog motor solved")
+    best = catalog.entry(ranking[0][0])
+    model, motor = build(best)
+    model.substitutions.update(motor_substitutions(motor, best))
+    return model.solve(verbosity=0, **kwargs), ranking
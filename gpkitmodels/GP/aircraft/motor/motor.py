@@ -81,6 +81,9 @@ class PropulsorPerf(Model):
 class Propulsor(Model):
     """Propulsor model
 
+    The propeller's flight model is prop_flight_model, which setup takes
+    to override the class attribute for this propulsor only.
+
     Variables
     ---------
     W                       [lbf]              propulsor weight
@@ -90,9 +93,9 @@ class Propulsor(Model):
     prop_flight_model = ActuatorProp
 
     @parse_variables(__doc__, globals())
-    def setup(self):
-        Propeller.flight_model = self.prop_flight_model
+    def setup(self, prop_flight_model=None):
         self.prop = Propeller()
+        self.prop.flight_model = prop_flight_model or self.prop_flight_model
         self.motor = Motor()
 
         components = [self.prop, self.motor]
@@ -1,8 +1,16 @@
-from gpkit import Model, parse_variables, SignomialsEnabled, SignomialEquality, units
+import shutil
+import tempfile
+import numpy as np
+from gpkit import Model, parse_variables, SignomialsEnabled, SignomialEquality, units, ureg
 from gpkitmodels.GP.aircraft.motor.motor import Propulsor, Motor, MotorPerf
+from gpkitmodels.GP.aircraft.motor.performance_map import (performance_map,
+                                                           PerformanceMap)
+from gpkitmodels.GP.aircraft.motor.catalog import (MotorCatalog, catalog_solve,
+                                                   motor_substitutions)
 from gpkitmodels.GP.aircraft.prop.propeller import Propeller, ActuatorProp
 from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
-from gpkitmodels.SP.aircraft.prop.propeller import BladeElementProp
+from gpkitmodels.SP.aircraft.prop.propeller import (BladeElementProp,
+                                                    staged_localsolve)
 
 class Propulsor_Test(Model):
     """Propulsor Test Model
@@ -23,8 +31,7 @@ class Actuator_Propulsor_Test(Model):
 
     def setup(self):
         fs = FlightState()
-        Propulsor.prop_flight_model = ActuatorProp
-        p = Propulsor()
+        p = Propulsor(prop_flight_model=ActuatorProp)
         pp = p.flight_model(p,fs)
         pp.substitutions[pp.prop.T] = 100
         self.cost = pp.motor.Pelec/(1000*units('W')) + p.W/(1000*units('lbf'))
@@ -36,8 +43,7 @@ class BladeElement_Propulsor_Test(Model):
 
     def setup(self):
         fs = FlightState()
-        Propulsor.prop_flight_model = BladeElementProp
-        p = Propulsor()
+        p = Propulsor(prop_flight_model=BladeElementProp)
         pp = p.flight_model(p,fs)
         pp.substitutions[pp.prop.T] = 100
         self.cost = pp.motor.Pelec/(1000*units('W')) + p.W/(1000*units('lbf'))
@@ -52,6 +58,30 @@ def ME_propulsor_test():
     test = BladeElement_Propulsor_Test()
     sol = test.localsolve(use_leqs=False)  # cvxopt gets singular with leqs
 
+def propulsor_model(prop_flight_model):
+    " blade element or actuator disk propulsor and its propeller model "
+    fs = FlightState()
+    p = Propulsor(prop_flight_model=prop_flight_model)
+    pp = p.flight_model(p, fs)
+    pp.substitutions[pp.prop.T] = 100
+    m = Model(pp.motor.Pelec/(1000*units('W')) + p.W/(1000*units('lbf')),
+              [fs, p, pp])
+    return m, pp.prop
+
+def staged_propulsor_test():
+    " blade element propulsor started from its actuator disk solution "
+    built = []
+    def build(prop_flight_model):
+        " propulsor_model, keeping each model to count its iterations "
+        m, prop = propulsor_model(prop_flight_model)
+        built.append(m)
+        return m, prop
+    sol = staged_localsolve(build, verbosity=0, use_leqs=False)
+    m, _ = propulsor_model(BladeElementProp)
+    cold = m.localsolve(verbosity=0, use_leqs=False)
+    assert abs(sol["cost"]/cold["cost"] - 1) < 1e-2
+    assert len(built[-1].program.gps) < len(m.program.gps)
+
 def propulsor_test():
     test = Propulsor_Test()
     sol = test.solve()
@@ -67,41 +97,90 @@ class Motor_P_Test(Model):
         self.cost = 1./mp.etam + m.W/(100.*units('lbf'))
         return self.mp, fs, m
 
-class speed_280_motor(Model):
-    def setup(self):
+class Catalog_Motor_Test(Model):
+    """MotorPerf of a catalog motor, at voltage v if given"""
+    def setup(self, name, v=None):
         fs = FlightState()
         m  = Motor()
         mp = MotorPerf(m,fs)
         self.mp = mp
-        mp.substitutions[m.Qmax] = 100
-        mp.substitutions[mp.R]   = .7
-        mp.substitutions[mp.i0]  = .16
-        mp.substitutions[mp.Kv]  = 3800
-        mp.substitutions[mp.v]   = 6
-        self.cost = 1./mp.etam
-        return self.mp, fs
-class hacker_q150_45_motor(Model):
-    def setup(self):
-        fs = FlightState()
-        m  = Motor()
-        mp = MotorPerf(m,fs)
-        self.mp = mp
-        mp.substitutions[m.Qmax] = 10000
-        mp.substitutions[mp.R]   = .033
-        mp.substitutions[mp.i0]  = 4.5
-        mp.substitutions[mp.Kv]  = 29
+        mp.substitutions.update(motor_substitutions(
+            m, MotorCatalog.read().entry(name)))
+        if v:
+            mp.substitutions[mp.v] = v
         self.cost = 1./mp.etam
         return self.mp, fs
 
+def performance_map_test():
+    " tabulate and interpolate a fixed propulsor's performance "
+    design = {"R_prop": 0.5, "Kv": 30, "Qmax": 50, "i0": 4.5,
+              "R_motor": 0.033, "V_max": 300}
+    lams, rhos = np.linspace(0.2, 0.6, 5), [0.8, 1.0, 1.2]
+    cache = tempfile.mkdtemp()
+    try:
+        pmap = performance_map(design, lams, rhos, 2000, workers=1,
+                               cache_dir=cache)
+        assert pmap.fields["CT"].shape == (5, 3)
+        w = 2000*ureg("rpm").to("rad/s").magnitude
+        V = lams[2]*w*0.5
+        perf = pmap(np.full(500, V), np.full(500, 1.0), np.full(500, 2000))
+        assert np.allclose(perf["T"], pmap.fields["T"][2, 1])
+        assert np.allclose(perf["Pelec"], pmap.fields["Pelec"][2, 1])
+        try:
+            pmap(V, 1.0, 3000)
+            raise AssertionError("the map only holds omega = 2000 rpm")
+        except ValueError:
+            pass
+        cached = performance_map(design, lams, rhos, 2000, cache_dir=cache)
+        assert np.array_equal(cached.fields["eta"], pmap.fields["eta"])
+    finally:
+        shutil.rmtree(cache)
+    between = PerformanceMap(design, [0, 1], [0, 1], 1000,
+                             {"CT": np.array([[0., 1], [2, 3]])})
+    assert np.isclose(between.interpolate("CT", 0.5, 0.5), 1.5)
+
+def catalog_propulsor(entry):
+    " actuator disk propulsor, with the Motor catalog_solve fixes to entry "
+    fs = FlightState()
+    p = Propulsor(prop_flight_model=ActuatorProp)
+    pp = p.flight_model(p, fs)
+    pp.substitutions[pp.prop.T] = 5
+    m = Model(pp.motor.Pelec/(1000*units('W')) + p.W/(1000*units('lbf')),
+              [fs, p, pp])
+    return m, p.motor
+
+def catalog_test():
+    " screen a motor catalog, then solve the propulsor with the best few "
+    catalog = MotorCatalog.read()
+    assert (np.diff(catalog.columns["Kv"]) >= 0).all()
+    for i in catalog.select(Kv=(100, 500), Qmax=(2, 20)):
+        assert 100 <= catalog[i]["Kv"] <= 500
+        assert 2 <= catalog[i]["Qmax"] <= 20
+    perf = catalog.performance([2., 3.], [3000, 4000])
+    assert perf["etam"].shape == (len(catalog), 2)
+    for i in catalog.screen([2., 3.], [3000, 4000]):
+        assert perf["feasible"][i].all()
+    assert catalog.entry("outrunner_3520_400kv")["Kv"] == 400
+
+    sol, ranking = catalog_solve(catalog_propulsor, catalog, [3.], [4000],
+                                 n=3, workers=1)
+    costs = [cost for _, cost in ranking if cost is not None]
+    assert abs(sol["cost"]/costs[0] - 1) < 1e-6 and costs == sorted(costs)
+
 def motor_test():
     test = Motor_P_Test()
     test.solve()
+    Catalog_Motor_Test("can_280_3800kv", v=6).solve()
+    Catalog_Motor_Test("inrunner_150mm_29kv").solve()
 
 def test():
     motor_test()
     actuator_propulsor_test()
     propulsor_test()
     ME_propulsor_test()
+    staged_propulsor_test()
+    performance_map_test()
+    catalog_test()
 
 if __name__ == "__main__":
     test()
@@ -0,0 +1,206 @@
+" tabulated propulsor performance for fast off-design evaluation "
+from __future__ import print_function
+from builtins import object
+import hashlib
+import json
+import multiprocessing
+import os
+import numpy as np
+from gpkit import Model, parse_variables, units, ureg
+from gpkitmodels.GP.aircraft.prop.propeller import Propeller, ActuatorProp
+from .motor import Motor, MotorPerf
+
+#pylint: disable=invalid-name, exec-used, undefined-variable
+
+CACHE_ENV = "GPKITMODELS_MAP_CACHE"
+
+# design value: (component, variable, units); the propeller's maximum
+# static thrust T_m is left free, so that it does not cap off-design thrust
+DESIGN = {"R_prop": ("prop", "R", "m"),
+          "Kv": ("motor", "Kv", "rpm/V"),
+          "Qmax": ("motor", "Qmax", "N*m"),
+          "i0": ("motor", "i0", "amp"),
+          "R_motor": ("motor", "R", "ohm"),
+          "V_max": ("motor", "V_max", "V")}
+FIELDS = ["CT", "CP", "eta", "etam", "T", "Pshaft", "Pelec"]
+
+class MapState(Model):
+    """ Operating point of a performance map
+
+    Variables
+    ---------
+    V                       [m/s]       airspeed
+    rho                     [kg/m^3]    air density
+
+    """
+    @parse_variables(__doc__, globals())
+    def setup(self):
+        return []
+
+def propulsor_design(sol, propulsor):
+    "{name: value in DESIGN units} of a solved Propulsor"
+    design = {}
+    for name, (component, var, unit) in DESIGN.items():
+        static = getattr(propulsor, component)
+        design[name] = float(sol(getattr(static, var)).to(unit).magnitude)
+    return design
+
+def design_key(design, lams, rhos, omega):
+    "hash of a design and map grid, naming its cache file"
+    blob = json.dumps([sorted((k, "%.6g" % v) for k, v in design.items()),
+                       ["%.6g" % x for x in lams], ["%.6g" % x for x in rhos],
+                       "%.6g" % omega])
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+def _map_point(job):
+    """maximum thrust of a fixed actuator disk propeller and motor at one
+    advance ratio, density and rotation rate [rpm]; None if infeasible"""
+    design, lam, rho, omega = job
+    prop, motor, state = Propeller(), Motor(), MapState()
+    pperf, mperf = ActuatorProp(prop, state), MotorPerf(motor, state)
+    statics = {"prop": prop, "motor": motor}
+    m = Model(100*units("N")/pperf.T + (prop.W + motor.W)/(1e6*units("lbf")),
+              [pperf.Q == mperf.Q, pperf.omega == mperf.omega,
+               prop, motor, state, pperf, mperf])
+    for name, (component, var, unit) in DESIGN.items():
+        m.substitutions[getattr(statics[component], var)] = (
+            design[name]*units(unit))
+    R = design["R_prop"]
+    omega_rad = omega*ureg("rpm").to("rad/s").magnitude
+    m.substitutions.update({pperf.omega: omega, state.rho: rho,
+                            state.V: lam*omega_rad*R})
+    try:
+        sol = m.solve(verbosity=0)
+    except (RuntimeWarning, ValueError):
+        return None
+    si = lambda v, u: float(sol(v).to(u).magnitude)
+    T, Q = si(pperf.T, "N"), si(pperf.Q, "N*m")
+    disk = 0.5*rho*(omega_rad*R)**2*np.pi*R**2
+    return {"CT": T/disk, "CP": Q*omega_rad/(disk*omega_rad*R),
+            "eta": si(pperf.eta, "dimensionless"),
+            "etam": si(mperf.etam, "dimensionless"), "T": T,
+            "Pshaft": si(mperf.Pshaft, "W"), "Pelec": si(mperf.Pelec, "W")}
+
+class PerformanceMap(object):
+    """Array-backed table of propulsor performance over advance ratio
+    lam = V/(omega*R) and density, at the map's rotation rate omega [rpm]
+
+    Each field ("CT", "CP", "eta", "etam", "T", "Pshaft", "Pelec") is a
+    (len(lam), len(rho)) array; points where the GP was infeasible hold
+    NaN. The thrust and power coefficients follow ActuatorProp's CT and CP,
+    with the rotation rate in rad/s.
+    """
+    def __init__(self, design, lam, rho, omega, fields):
+        self.design = design
+        self.lam, self.rho = np.asarray(lam, float), np.asarray(rho, float)
+        self.omega = omega
+        self.fields = fields
+
+    def interpolate(self, name, lam, rho):
+        """bilinear interpolation of field name at arrays of lam and rho,
+        clamped to the edges of the grid"""
+        lam, rho = np.broadcast_arrays(np.asarray(lam, float),
+                                       np.asarray(rho, float))
+        out = []
+        for axis, x in ((self.lam, lam), (self.rho, rho)):
+            x = np.clip(x, axis[0], axis[-1])
+            i = np.clip(np.searchsorted(axis, x) - 1, 0, len(axis) - 2)
+            out.append((i, (x - axis[i])/(axis[i + 1] - axis[i])))
+        (i, u), (j, v) = out
+        f = self.fields[name]
+        return ((1 - u)*(1 - v)*f[i, j] + u*(1 - v)*f[i + 1, j]
+                + (1 - u)*v*f[i, j + 1] + u*v*f[i + 1, j + 1])
+
+    def __call__(self, V, rho, omega=None):
+        """performance at arrays of speed V [m/s] and density rho [kg/m^3]
+
+        Thrust and power scale from the coefficients at the state's advance
+        ratio; efficiencies are read directly. The motor's limits and
+        efficiency were solved at the map's rotation rate only, so omega
+        [rpm], if given, must equal it.
+        """
+        if omega is not None and not np.allclose(omega, self.omega):
+            raise ValueError("the map was solved at omega = %g rpm only"
+                             % self.omega)
+        R = self.design["R_prop"]
+        w = self.omega*ureg("rpm").to("rad/s").magnitude
+        rho = np.asarray(rho, float)
+        lam = np.asarray(V, float)/(w*R)
+        disk = 0.5*rho*(w*R)**2*np.pi*R**2
+        out = dict((name, self.interpolate(name, lam, rho))
+                   for name in ["CT", "CP", "eta", "etam"])
+        out["T"] = out["CT"]*disk
+        out["Pshaft"] = out["CP"]*disk*w*R
+        out["Pelec"] = out["Pshaft"]/out["etam"]
+        return out
+
+    def save(self, path):
+        "writes the map to an .npz file"
+        np.savez(path, lam=self.lam, rho=self.rho, omega=self.omega,
+                 design=json.dumps(self.design), **self.fields)
+
+    @classmethod
+    def load(cls, path):
+        "reads a map written by save"
+        with np.load(path) as data:
+            return cls(json.loads(str(data["design"])), data["lam"],
+                       data["rho"], float(data["omega"]),
+                       dict((name, data[name]) for name in FIELDS))
+
+def performance_map(design, lams, rhos, omega, workers=None, cache_dir=None,
+                    verbosity=0):
+    """PerformanceMap of a fixed propulsor design
+
+    Arguments
+    ---------
+    design: dict
+        {name: value} for every name in DESIGN, e.g. from propulsor_design
+    lams, rhos: arrays
+        increasing advance ratios and densities [kg/m^3] of the grid
+    omega: float
+        rotation rate [rpm] at which the points are solved
+    workers: int
+        size of the process pool; defaults to the number of cpus, 1 solves
+        the points serially in this process
+    cache_dir: str
+        directory of cached maps, keyed by design and grid; defaults to
+        $GPKITMODELS_MAP_CACHE or ~/.cache/gpkitmodels/maps, and an empty
+        string disables caching
+
+    Each point maximizes the thrust of ActuatorProp and MotorPerf at the
+    grid's advance ratio and density, limited by the motor; the
+    propeller's design T_m is not imposed.
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_ENV, os.path.join(
+            os.path.expanduser("~"), ".cache", "gpkitmodels", "maps"))
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, design_key(design, lams, rhos, omega)
+                            + ".npz")
+        if os.path.exists(path):
+            return PerformanceMap.load(path)
+
+    jobs = [(design, lam, rho, omega) for lam in lams for rho in rhos]
+    if workers == 1:
+        res = [_map_point(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            res = pool.map(_map_point, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    fields = {}
+    for name in FIELDS:
+        fields[name] = np.array([np.nan if r is None else r[name]
+                                 for r in res]).reshape(len(lams), len(rhos))
+    if verbosity > 0:
+        print("performance map: %d of %d points infeasible"
+              % (sum(r is None for r in res), len(res)))
+    pmap = PerformanceMap(design, lams, rhos, omega, fields)
+    if path:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        pmap.save(path)
+    return pmap
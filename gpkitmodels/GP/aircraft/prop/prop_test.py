@@ -1,16 +1,18 @@
 " propeller tests "
+import numpy as np
 from gpkitmodels.GP.aircraft.prop.propeller import Propeller, ActuatorProp
 from gpkitmodels.SP.aircraft.prop.propeller import BladeElementProp
+from gpkit.constraints.tight import Tight as TCS
 
 from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+from gpkitmodels.tools.continuation import continuation_solve
 from gpkit import units, Model
 
 def simpleprop_test():
     " test simple propeller model "
     fs = FlightState()
-    Propeller.flight_model = ActuatorProp
     p = Propeller()
-    pp = p.flight_model(p, fs)
+    pp = ActuatorProp(p, fs)
     m = Model(1/pp.eta  + p.W/(100.*units("lbf"))+ pp.Q/(100.*units("N*m")),
               [fs, p, pp])
     m.substitutions.update({"rho": 1.225, "V": 50, "T": 100, "omega":1000})
@@ -19,18 +21,69 @@ def simpleprop_test():
 def ME_eta_test():
 
     fs  = FlightState()
-    Propeller.flight_model = BladeElementProp
     p   = Propeller()
-    pp = p.flight_model(p,fs)
+    pp = BladeElementProp(p,fs)
     pp.substitutions[pp.T]  = 100
     pp.cost = 1./pp.eta + pp.Q/(1000.*units("N*m")) + p.T_m/(1000*units('N'))
     sol = pp.localsolve(iteration_limit = 400)
 
+class LoopedBladeElementProp(BladeElementProp):
+    " BladeElementProp with its radii and eta_i built element by element "
+    def setup(self, static, state, N=5):
+        constraints, blade = BladeElementProp.setup(self, static, state, N)
+        constraints[2:4] = [blade.r[0] == static.R/(2.*N)]
+        for n in range(1, N):
+            constraints += [TCS([blade.r[n] >= blade.r[n-1] + static.R/N]),
+                            blade.eta_i[n] == blade.eta_i[n-1]]
+        return constraints, blade
+
+def ME_scaling_test():
+    " sliced blade elements solve as the element by element ones do "
+    # converged tightly: at the default reltol the two stop at iterates
+    # that differ by up to 1e-3 in eta
+    for N in [5, 20]:
+        etas = []
+        for prop_model in [BladeElementProp, LoopedBladeElementProp]:
+            fs = FlightState()
+            p = Propeller(N=N)
+            pp = prop_model(p, fs, N=N)
+            pp.substitutions[pp.T] = 100
+            pp.cost = (1./pp.eta + pp.Q/(1000.*units("N*m"))
+                       + p.T_m/(1000*units('N')))
+            sol = pp.localsolve(verbosity=0, iteration_limit=400,
+                                reltol=1e-6)
+            r = sol(pp.blade.r)/sol(p.R)
+            assert np.allclose(r, (np.arange(N) + 0.5)/N)
+            etas.append(sol(pp.eta))
+        assert abs(etas[1]/etas[0] - 1) < 1e-5
+
+def blade_element_prop(N):
+    " blade element propeller with N elements, and its N + 1 nodes "
+    fs = FlightState()
+    p = Propeller(N=N)
+    pp = BladeElementProp(p, fs, N=N)
+    pp.substitutions[pp.T] = 100
+    pp.cost = (1./pp.eta + pp.Q/(1000.*units("N*m"))
+               + p.T_m/(1000*units('N')))
+    return pp, np.linspace(0, 1, N + 1)
+
+def continuation_test():
+    " solve a blade element propeller coarse to fine "
+    sol, report = continuation_solve(blade_element_prop, [5, 10],
+                                     memory=True, iteration_limit=400)
+    assert [r["N"] for r in report] == [5, 10]
+    assert all(r["memory"] > 0 for r in report)
+    m, _ = blade_element_prop(10)
+    direct = m.localsolve(verbosity=0, iteration_limit=400)
+    assert abs(sol["cost"]/direct["cost"] - 1) < 1e-3
+    assert report[-1]["solves"] < len(m.program.gps)
 
 def test():
     "tests"
     simpleprop_test()
     ME_eta_test()
+    ME_scaling_test()
+    continuation_test()
 if __name__ == "__main__":
     test()
 
@@ -4,7 +4,6 @@ from gpkit import Model, Variable,Vectorize,parse_variables, SignomialsEnabled,
 from gpkit.constraints.tight import Tight as TCS
 from gpfit.fit_constraintset import XfoilFit
 import os
-import pandas as pd
 
 class ActuatorProp(Model):
     """ Propeller Model
@@ -35,6 +34,7 @@ class ActuatorProp(Model):
 
     @parse_variables(__doc__, globals())
     def setup(self, static, state):
+        self.static, self.state = static, state
         V = state.V
         rho = state.rho
         R = static.R
@@ -1,8 +1,8 @@
 " tail aerodynamics "
 import os
-import pandas as pd
 from gpkit import Model, parse_variables
 from gpfit.fit_constraintset import XfoilFit
+from gpkitmodels.tools.fitdata import load_fitdata
 
 #pylint: disable=exec-used, attribute-defined-outside-init, undefined-variable
 #pylint: disable=no-member
@@ -40,8 +40,7 @@ class TailAero(Model):
         V = self.V = state.V
         mu = self.mu = state.mu
         path = os.path.dirname(__file__)
-        fd = pd.read_csv(path + os.sep + "tail_dragfit.csv").to_dict(
-            orient="records")[0]
+        fd = load_fitdata(path + os.sep + "tail_dragfit.csv")
 
         constraints = [
             Re == V*rho*S/b/mu,
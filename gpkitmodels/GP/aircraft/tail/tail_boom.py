@@ -1,9 +1,11 @@
 " tail boom model "
+import numpy as np
 from numpy import pi
 from gpkit import Model, parse_variables, Variable, VectorVariable, units
 from .tube_spar import TubeSpar
 from gpkitmodels.GP.beam.beam import Beam
 from gpkitmodels import g
+from gpkitmodels.tools.spacing import node_spacing
 
 #pylint: disable=exec-used, undefined-variable, invalid-name
 #pylint: disable=attribute-defined-outside-init
@@ -135,9 +137,7 @@ class TailBoomBending(Model):
         self.htail = htail
         self.tailboom = tailboom
 
-        Beam.qbarFun = [1e-10]*N
-        Beam.SbarFun = [1.]*N
-        beam = self.beam = Beam(N)
+        beam = self.beam = Beam(N, qbarFun=[1e-10]*N, SbarFun=[1.]*N)
 
         I = tailboom.I
         tailboom.I0 = I[0]
@@ -167,18 +167,21 @@ class TailBoomBending(Model):
 class TailBoom(TubeSpar):
     """ Tail Boom Model
 
+    secondaryWeight, passed to setup, overrides the class attribute for
+    this tail boom only.
+
     Variables
     ---------
     l                           [ft]        tail boom length
     S                           [ft^2]      tail boom surface area
     b                           [ft]        twice tail boom length
-    deta          1./(N-1)      [-]         normalized segment length
     tau           1.0           [-]         thickness to width ratio
     rhoA          0.15          [kg/m^2]    total aerial density
 
     Variables of length N-1
     -----------------------
     cave                        [in]        average segment width
+    deta    np.diff(node_spacing(N,spacing))    [-]     normalized segment length
 
     """
 
@@ -187,10 +190,12 @@ class TailBoom(TubeSpar):
     secondaryWeight = None
 
     @parse_variables(__doc__, globals())
-    def setup(self, N=5):
+    def setup(self, N=5, spacing="uniform", secondaryWeight=None):
         self.N = N
         self.spar = super(TailBoom, self).setup(N, self)
 
+        if secondaryWeight is not None:
+            self.secondaryWeight = secondaryWeight
         if self.secondaryWeight:
             self.weight.right += rhoA*g*S
 
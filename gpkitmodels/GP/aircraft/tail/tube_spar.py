@@ -1,6 +1,6 @@
 " tube spar "
 from numpy import pi
-from gpkitmodels.GP.materials import cfrpfabric
+from gpkitmodels.GP.materials import SharedMaterial
 from gpkitmodels import g
 from gpkit import Model, parse_variables
 
@@ -38,7 +38,7 @@ class TubeSpar(Model):
     """
 
     minusk2 = lambda self, c: 1-c(self.k)/2.
-    material = cfrpfabric
+    material = SharedMaterial("cfrpfabric")
 
     @parse_variables(__doc__, globals())
     def setup(self, N, surface):
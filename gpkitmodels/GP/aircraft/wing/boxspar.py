@@ -2,7 +2,7 @@
 from gpkit import Model, parse_variables, SignomialsEnabled
 from .sparloading import SparLoading
 from .gustloading import GustL
-from gpkitmodels.GP.materials import cfrpud, cfrpfabric, foamhd
+from gpkitmodels.GP.materials import SharedMaterial
 from gpkitmodels import g
 
 #pylint: disable=exec-used, undefined-variable, unused-argument, invalid-name
@@ -55,9 +55,9 @@ class BoxSpar(Model):
     """
     loading = SparLoading
     gustloading = GustL
-    material = cfrpud
-    shearMaterial = cfrpfabric
-    coreMaterial = foamhd
+    material = SharedMaterial("cfrpud")
+    shearMaterial = SharedMaterial("cfrpfabric")
+    coreMaterial = SharedMaterial("foamhd")
 
     @parse_variables(__doc__, globals())
     def setup(self, N, surface):
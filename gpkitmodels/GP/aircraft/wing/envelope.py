@@ -0,0 +1,118 @@
+" sizing a wing spar against only the load cases that are active "
+from __future__ import print_function
+import numpy as np
+from gpkit import Model, ureg
+from .spar_check import SparCheck
+
+#pylint: disable=invalid-name, too-many-arguments, too-many-locals
+
+def case_loading(wing, state, case):
+    """SparLoading, or GustL if case has a speed "v", for a load case dict
+
+    Case keys are "W" [lbf] loading weight, optional "Nmax", and for gusts
+    "v" [m/s], "cl" and optional "vgust" [m/s]; the gust wing weight is
+    tied to wing.W.
+    """
+    if "v" in case:
+        loading = wing.spar.gustloading(wing, state)
+        loading.substitutions.update({loading.v: case["v"],
+                                      loading.cl: case["cl"]})
+        if "vgust" in case:
+            loading.substitutions[loading.vgust] = case["vgust"]
+        constraints = [loading, loading.Ww == wing.W]
+    else:
+        loading = wing.spar.loading(wing, state)
+        constraints = [loading]
+    loading.substitutions[loading.W] = case["W"]
+    if "Nmax" in case:
+        loading.substitutions[loading.Nmax] = case["Nmax"]
+    return constraints
+
+def case_loads(check, cases, cbar, Ww):
+    "(cases, N) distributed loads [N/m] of case dicts on check's beam"
+    lbf = ureg("lbf").to("N").magnitude
+    q = np.zeros((len(cases), len(check.eta)))
+    for i, case in enumerate(cases):
+        if "v" in case:
+            q[i] = check.gust_load(cbar, case["W"]*lbf, Ww*lbf, case["v"],
+                                   case["cl"], case.get("vgust", 10.),
+                                   case.get("Nmax", 5.))
+        else:
+            q[i] = check.static_load(cbar, case["W"]*lbf,
+                                     case.get("Nmax", 5.))
+    return q
+
+def screen(check, q, margin=0.05):
+    """indices of the load cases within margin of the largest stress at
+    any element, or of the largest tip deflection
+
+    Moments are statically determinate, so the stress ranking at each
+    element does not depend on the spar sections; only the deflection
+    ranking does.
+    """
+    res = check.analyze(q)
+    stress = res["stress"]
+    active = (stress >= (1 - margin)*stress.max(0)).any(1)
+    w = res["w"][:, -1]
+    active |= w >= (1 - margin)*w.max()
+    return [int(i) for i in np.nonzero(active)[0]]
+
+def envelope_solve(build, cases, margin=0.05, tol=1e-3, max_iter=10,
+                   verbosity=0, **kwargs):
+    """sizes a wing's spar with only the load cases that can be active
+
+    Arguments
+    ---------
+    build: function
+        returns (model, wing, state): the model with its cost set and
+        without structural load cases, its Wing and the state passed to
+        the loadings (for qne)
+    cases: list of dicts
+        load cases, as taken by case_loading
+    margin: float
+        cases within this fraction of the worst case are kept
+    tol: float
+        allowed stress and deflection ratio overshoot of pruned cases
+    kwargs:
+        passed to solve
+
+    Screens the cases on a unit-section beam, solves with the active
+    ones, then checks every case against the solved spar with SparCheck,
+    adding any that is violated and re-solving until none is.
+
+    Returns
+    -------
+    solution, and a dict of the "active" case indices, "solves" and the
+    "violated" cases found at each verification
+    """
+    base, wing, state = build()
+    c = base.substitutions
+    cbar = wing.planform.return_c(c)
+    eta = c(wing.planform.eta).to("dimensionless").magnitude
+    Ww = c(wing.W).to("lbf").magnitude if wing.W in c else 0.
+    unit = SparCheck(eta, 1., np.ones(len(eta) - 1), np.ones(len(eta) - 1),
+                     1., 1.)
+    active = screen(unit, case_loads(unit, cases, cbar, Ww), margin)
+    loadings = {}
+    report = {"violated": []}
+    for solves in range(1, max_iter + 1):
+        for i in active:
+            if i not in loadings:
+                loadings[i] = case_loading(wing, state, cases[i])
+        model = Model(base.cost, [base, [loadings[i] for i in active]])
+        sol = model.solve(verbosity=max(verbosity - 1, 0), **kwargs)
+        check = SparCheck.from_wing(sol, wing)
+        res = check.analyze(case_loads(check, cases, cbar,
+                                       sol(wing.W).to("lbf").magnitude))
+        worst = np.maximum(res["stress ratio"], res["deflection ratio"])
+        violated = [int(i) for i in np.nonzero(worst > 1 + tol)[0]
+                    if i not in active]
+        report["violated"].append(violated)
+        if verbosity > 0:
+            print("envelope solve %d: %d of %d cases, %d violated"
+                  % (solves, len(active), len(cases), len(violated)))
+        if not violated:
+            break
+        active = sorted(active + violated)
+    report["active"], report["solves"] = active, solves
+    return sol, report
@@ -1,15 +1,24 @@
 " spar loading for gust case "
 import os
-from numpy import pi, hstack, array
-from ad.admath import cos
-import pandas as pd
-from gpkit import parse_variables
+from contextlib import contextmanager
+from numpy import pi, hstack, array, tile
+from gpkit import parse_variables, Vectorize
 from gpfit.fit_constraintset import FitCS
-from .sparloading import SparLoading
+from gpkitmodels.tools.fitdata import load_fitdata
+from .sparloading import SparLoading, case_column
 
 #pylint: disable=invalid-name, no-member, arguments-differ, exec-used
 #pylint: disable=attribute-defined-outside-init, undefined-variable
 
+@contextmanager
+def unvectorized():
+    "creates variables within as scalars, whatever Vectorize encloses it"
+    vectorization, Vectorize.vectorization = Vectorize.vectorization, ()
+    try:
+        yield
+    finally:
+        Vectorize.vectorization = vectorization
+
 class GustL(SparLoading):
     """ Gust Loading Model
 
@@ -38,26 +47,37 @@ class GustL(SparLoading):
     new_SbarFun = None
 
     def return_cosm1(self, c):
+        from ad.admath import cos
         eta = c(self.wing.planform.eta).to("dimensionless").magnitude
-        return hstack([1e-10, 1-array(cos(eta[1:]*pi/2))])
+        cosm1 = hstack([1e-10, 1-array(cos(eta[1:]*pi/2))])
+        cases = self.cosminus1.shape[1:]
+        return tile(cosm1.reshape((-1,) + (1,)*len(cases)), (1,) + cases)
 
     @parse_variables(__doc__, globals())
     def setup(self, wing, state, out=False):
         self.load = SparLoading.setup(self, wing, state, out=out)
 
-        cbar = self.wing.planform.cbar
         W = self.W  # from SparLoading
         q = self.q
         N = self.N
         b = self.b
+        cbar = case_column(self.wing.planform.cbar, q)
 
         path = os.path.dirname(os.path.abspath(__file__))
-        df = pd.read_csv(path + os.sep + "arctan_fit.csv").to_dict(
-            orient="records")[0]
+        df = load_fitdata(path + os.sep + "arctan_fit.csv")
+
+        y, x = agust, cosminus1*vgust/v
+        if len(q.shape) > 1:
+            # the fit takes one-dimensional variables, and its fit factor
+            # must stay a scalar to divide them
+            with unvectorized():
+                fit = FitCS(df, y.flatten(), [x.flatten()])
+        else:
+            fit = FitCS(df, y, [x])
 
         constraints = [
             # fit for arctan from 0 to 1, RMS = 0.044
-            FitCS(df, agust, [cosminus1*vgust/v]),
+            fit,
             q >= W*N/b*cbar*(1 + 2*pi*agust/cl*(1+Ww/W)),
             ]
 
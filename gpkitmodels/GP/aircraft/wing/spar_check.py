@@ -0,0 +1,128 @@
+" vectorized beam analysis of solved spars over many load cases "
+import numpy as np
+
+#pylint: disable=invalid-name, too-many-arguments, too-many-locals
+
+def _si(sol, var, units):
+    "solution value of var as a float array in units"
+    return np.asarray(sol(var).to(units).magnitude, dtype=float)
+
+class SparCheck(object):
+    """Cantilever beam with fixed sections, loaded by arrays of load cases
+
+    Uses the trapezoidal recursions of SparLoading (and Beam): shear and
+    moment integrated from the tip, slope and deflection from the root,
+    and twist from the root under the section pitching moment.
+
+    Arguments
+    ---------
+    eta: array of N node positions from root (0) to tip (1)
+    length: float, [m] half span of a wing, or length of a tail boom
+    I: array of N-1 element moments of inertia [m^4]
+    Sy: array of N-1 element section moduli [m^3]
+    E, sigma: floats, Young's modulus and allowable stress [Pa]
+    J: array of N-1 element torsional constants [m^4], optional
+    G: float, shear modulus [Pa], optional
+
+    Every array may carry leading axes (e.g. several designs) that
+    broadcast against the load cases.
+    """
+    def __init__(self, eta, length, I, Sy, E, sigma, J=None, G=None):
+        self.eta = np.asarray(eta, dtype=float)
+        self.length = length
+        self.dx = np.diff(self.eta)*length
+        self.I, self.Sy = np.asarray(I, float), np.asarray(Sy, float)
+        self.E, self.sigma = E, sigma
+        self.J, self.G = J, G
+
+    @classmethod
+    def from_wing(cls, sol, wing):
+        "checker for the solved spar of wing (a CapSpar or BoxSpar)"
+        spar = wing.spar
+        J = G = None
+        if hasattr(spar, "J"):
+            J = _si(sol, spar.J, "m^4")
+            G = float(_si(sol, spar.shearMaterial.G, "Pa"))
+        return cls(_si(sol, wing.planform.eta, "dimensionless"),
+                   float(_si(sol, wing.planform.b, "m"))/2,
+                   _si(sol, spar.I, "m^4"), _si(sol, spar.Sy, "m^3"),
+                   float(_si(sol, spar.material.E, "Pa")),
+                   float(_si(sol, spar.material.sigma, "Pa")), J, G)
+
+    @classmethod
+    def from_tailboom(cls, sol, tailboom):
+        "checker for a solved TailBoom (TubeSpar), loaded at its tip"
+        deta = _si(sol, tailboom.deta, "dimensionless")
+        eta = np.hstack([0, np.cumsum(np.ones(tailboom.N - 1)*deta)])
+        return cls(eta/eta[-1], float(_si(sol, tailboom.l, "m")),
+                   _si(sol, tailboom.I, "m^4"), _si(sol, tailboom.Sy, "m^3"),
+                   float(_si(sol, tailboom.material.E, "Pa")),
+                   float(_si(sol, tailboom.material.sigma, "Pa")))
+
+    def static_load(self, cbar, W, Nmax=5., Nsafety=1.):
+        """distributed loads [N/m] of SparLoading for arrays of loading
+        weight W [N] and load factor Nmax, on chord distribution cbar"""
+        N = Nsafety*np.asarray(Nmax, float)[..., None]
+        return N*np.asarray(W, float)[..., None]/(2*self.length)*cbar
+
+    def gust_load(self, cbar, W, Ww, v, cl, vgust=10., Nmax=5.,
+                  Nsafety=1.):
+        """distributed loads [N/m] of GustL for arrays of loading weight W
+        [N], wing weight Ww [N], speed v [m/s], lift coefficient cl and
+        gust velocity vgust [m/s]; uses arctan itself where GustL fits it"""
+        cosm1 = np.hstack([1e-10, 1 - np.cos(self.eta[1:]*np.pi/2)])
+        q = self.static_load(cbar, W, Nmax, Nsafety)
+        v, cl, W, Ww, vgust = [np.asarray(x, float)[..., None]
+                               for x in (v, cl, W, Ww, vgust)]
+        agust = np.arctan(cosm1*vgust/v)
+        return q*(1 + 2*np.pi*agust/cl*(1 + Ww/W))
+
+    def twist_moment(self, cave, qne, CM=0.14, Nsafety=1.):
+        """element twisting moments [N*m] of SparLoading for mid-element
+        chords cave [m] and arrays of never exceed dynamic pressure qne
+        [Pa]"""
+        qne = np.asarray(qne, float)[..., None]
+        return CM*np.asarray(cave, float)**2*qne*self.dx*Nsafety
+
+    def analyze(self, q, Stip=0., Mtip=0., throot=0., wroot=0., Mtw=None,
+                kappa=0.2, twmax=15.*np.pi/180):
+        """beam response to distributed loads q [N/m] of shape (..., N)
+
+        Mtw, an optional (..., N-1) array of element twisting moments
+        [N*m], is integrated into the twist theta when J and G are known.
+
+        Returns
+        -------
+        dict of arrays: node shear "S" [N], moment "M" [N*m], slope "th"
+        and deflection "w" [m]; element "stress" [Pa] and "theta"; and
+        per case the "stress ratio" (peak stress over sigma), "deflection
+        ratio" (tip deflection over kappa*length), "twist ratio" and
+        whether the case "passed" (all ratios at most 1)
+        """
+        q = np.asarray(q, dtype=float)
+        dS = 0.5*self.dx*(q[..., :-1] + q[..., 1:])
+        S = Stip + np.concatenate([np.cumsum(dS[..., ::-1], -1)[..., ::-1],
+                                   np.zeros(dS.shape[:-1] + (1,))], -1)
+        dM = 0.5*self.dx*(S[..., :-1] + S[..., 1:])
+        M = Mtip + np.concatenate([np.cumsum(dM[..., ::-1], -1)[..., ::-1],
+                                   np.zeros(dM.shape[:-1] + (1,))], -1)
+        dth = 0.5*self.dx*(M[..., 1:] + M[..., :-1])/self.E/self.I
+        th = throot + np.concatenate([np.zeros(dth.shape[:-1] + (1,)),
+                                      np.cumsum(dth, -1)], -1)
+        dw = 0.5*self.dx*(th[..., 1:] + th[..., :-1])
+        w = wroot + np.concatenate([np.zeros(dw.shape[:-1] + (1,)),
+                                    np.cumsum(dw, -1)], -1)
+        stress = M[..., :-1]/self.Sy
+        out = {"S": S, "M": M, "th": th, "w": w, "stress": stress,
+               "stress ratio": stress.max(-1)/self.sigma,
+               "deflection ratio": w[..., -1]/self.length/kappa}
+        ratios = [out["stress ratio"], out["deflection ratio"]]
+        if Mtw is not None and self.J is not None:
+            theta = np.cumsum(np.asarray(Mtw, float)*self.dx/self.G/self.J,
+                              -1)
+            out["theta"] = theta
+            out["twist ratio"] = theta[..., -1]/twmax
+            ratios.append(out["twist ratio"])
+        out["passed"] = np.all([r <= 1 for r in np.broadcast_arrays(*ratios)],
+                               axis=0)
+        return out
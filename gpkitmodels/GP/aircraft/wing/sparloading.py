@@ -5,9 +5,18 @@ from numpy import pi
 #pylint: disable=no-member, unused-argument, exec-used, invalid-name
 #pylint: disable=undefined-variable, attribute-defined-outside-init
 
+def case_column(x, q):
+    """wing distribution x shaped to broadcast against q, which carries the
+    load cases on trailing axes when the loading is built in a Vectorize"""
+    return x.reshape(x.shape + (1,)*(len(q.shape) - 1))
+
 class SparLoading(Model):
     """ Spar Loading Model
 
+    Built within a Vectorize(n), the loading holds n load cases: scalars
+    such as W, Nmax and the state's qne become vectors of length n and
+    distributions gain a trailing axis of n, all in one constraint block.
+
     Variables
     ---------
     Nmax            5              [-]     max loading
@@ -61,7 +70,9 @@ class SparLoading(Model):
         cbar = self.cbar = self.wing.planform.cbar
         E = self.wing.spar.material.E
         sigma = self.wing.spar.material.sigma
-        deta = self.wing.planform.deta
+        deta = case_column(self.wing.planform.deta, q)
+        I, Sy, cave = [case_column(x, q) for x in (I, Sy, cave)]
+        cbar = case_column(cbar, q)
 
         constraints = []
         if not out:
@@ -82,6 +93,7 @@ class SparLoading(Model):
         if self.wingSparJ:
             qne = self.qne = state.qne
             J = self.J = self.wing.spar.J
+            J = case_column(J, q)
             G = self.wing.spar.shearMaterial.G
             cm = self.wing.planform.CM
             constraints.extend([
@@ -3,12 +3,13 @@ from builtins import range
 from os import sep
 from os.path import abspath, dirname
 import numpy as np
-import pandas as pd
 from gpkit import Model, parse_variables
 from .wing_core import WingCore
 from .wing_skin import WingSkin
 from .capspar import CapSpar
 from gpfit.fit_constraintset import XfoilFit
+from gpkitmodels.tools.fitdata import load_fitdata
+from gpkitmodels.tools.spacing import node_spacing
 
 #pylint: disable=no-member, invalid-name, unused-argument, exec-used
 #pylint: disable=undefined-variable, attribute-defined-outside-init
@@ -32,7 +33,7 @@ class Planform(Model):
 
     Variables of length N
     ---------------------
-    eta         np.linspace(0,1,N)      [-]     (2y/b)
+    eta         node_spacing(N,spacing) [-]     (2y/b)
     cbar        self.return_c           [-]     non-dim chord at nodes
 
     Variables of length N-1
@@ -82,7 +83,7 @@ class Planform(Model):
     return_deta = lambda self, c: np.diff(c(self.eta))
 
     @parse_variables(__doc__, globals())
-    def setup(self, N):
+    def setup(self, N, spacing="uniform"):
         return [b**2 == S*AR,
                 cave == cbave*S/b,
                 croot == S/b*cbar[0],
@@ -123,8 +124,7 @@ class WingAero(Model):
         self.state = state
         self.static = static
 
-        df = pd.read_csv(fitdata)
-        fd = df.to_dict(orient="records")[0]
+        fd = load_fitdata(fitdata)
 
         AR = static.planform.AR
         cmac = static.planform.cmac
@@ -147,10 +147,16 @@ class WingAero(Model):
                 CL <= CLstall
                ]
 
+COMPONENTS = ("sparModel", "fillModel", "skinModel", "flight_model")
+
 class Wing(Model):
     """
     Wing Model
 
+    The sparModel, fillModel, skinModel and flight_model class attributes
+    can be overridden for one wing by passing them to setup, e.g.
+    Wing(sparModel=BoxSpar); None leaves that component out.
+
     Variables
     ---------
     W                   [lbf]       wing weight
@@ -179,9 +185,13 @@ class Wing(Model):
     sparJ = False
 
     @parse_variables(__doc__, globals())
-    def setup(self, N=5):
+    def setup(self, N=5, spacing="uniform", **components):
+        for name, model in components.items():
+            if name not in COMPONENTS:
+                raise TypeError("unexpected Wing component %r" % name)
+            setattr(self, name, model)
         self.N = N
-        self.planform = Planform(N)
+        self.planform = Planform(N, spacing)
         self.components = []
 
         if self.skinModel:
@@ -1,6 +1,6 @@
 " wing interior "
 from gpkit import Model, parse_variables
-from gpkitmodels.GP.materials import foamhd
+from gpkitmodels.GP.materials import SharedMaterial
 from gpkitmodels import g
 
 #pylint: disable=exec-used, no-member, undefined-variable
@@ -27,7 +27,7 @@ class WingCore(Model):
     Abar                    \\bar{A}
 
     """
-    material = foamhd
+    material = SharedMaterial("foamhd")
 
     @parse_variables(__doc__, globals())
     def setup(self, surface):
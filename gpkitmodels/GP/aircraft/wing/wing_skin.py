@@ -1,6 +1,6 @@
 " wing skin "
 from gpkit import Model, parse_variables
-from gpkitmodels.GP.materials import cfrpfabric
+from gpkitmodels.GP.materials import SharedMaterial
 from gpkitmodels import g
 
 class WingSkin(Model):
@@ -33,7 +33,7 @@ class WingSkin(Model):
     Vne     V_{\\mathrm{NE}}
 
     """
-    material = cfrpfabric
+    material = SharedMaterial("cfrpfabric")
 
     @parse_variables(__doc__, globals())
     def setup(self, surface):
@@ -1,9 +1,14 @@
 " wing test "
+import numpy as np
 from gpkitmodels.GP.aircraft.wing.wing import Wing
 from gpkitmodels.GP.aircraft.wing.wing_skin import WingSkin
 from gpkitmodels.GP.aircraft.wing.wing_core import WingCore
 from gpkitmodels.GP.aircraft.wing.boxspar import BoxSpar
-from gpkit import Model, parse_variables
+from gpkitmodels.GP.aircraft.wing.spar_check import SparCheck
+from gpkitmodels.GP.aircraft.wing.envelope import (envelope_solve,
+                                                   case_loading)
+from gpkitmodels.tools.richardson import extrapolated_solve
+from gpkit import Model, parse_variables, Vectorize
 
 #pylint: disable=no-member, exec-used
 
@@ -22,10 +27,10 @@ class FlightState(Model):
     def setup(self):
         return [qne == V**2*rho*1.2]
 
-def wing_test():
-    " test wing models "
+def loaded_wing(N=5, spacing="uniform"):
+    " wing with static and gust loading, returning the model and its eta "
 
-    W = Wing()
+    W = Wing(N, spacing)
     W.substitutions[W.W] = 50
     W.substitutions[W.planform.tau] = 0.115
     fs = FlightState()
@@ -47,13 +52,108 @@ def wing_test():
         loading[1].Ww == W.W,
         loading[1].Ww <= 0.5*fs.rho*fs.V**2*perf.CL*W.planform.S,
         W, fs, perf, loading])
+    m.wing, m.loading = W, loading
+    return m, W.planform.eta
+
+def wing_test():
+    " test wing models "
+    m, _ = loaded_wing()
     m.solve(verbosity=0)
+    m, _ = loaded_wing(spacing="sine")
+    m.solve(verbosity=0)
+
+def wing_outputs(N):
+    " loaded wing with its spar weight and tip deflection "
+    # only outputs the GP holds tight converge with N: M, for one, is only
+    # bounded from below
+    m, _ = loaded_wing(N)
+    return m, {"spar weight": m.wing.spar.W,
+               "tip deflection": m.loading[0].w[-1]}
+
+def richardson_test():
+    " extrapolate wing results from coarse grids "
+    res = extrapolated_solve(wing_outputs, [5, 9, 17])
+    assert set(res) == set(["spar weight", "tip deflection", "cost"])
+    m, outputs = wing_outputs(33)
+    sol = m.solve(verbosity=0)
+    for label, expr in outputs.items():
+        fine = sol(expr).magnitude
+        error = abs(res[label]["value"] - fine)
+        assert error <= res[label]["error"] + 1e-3*fine
+
+def spar_check_test():
+    " check a solved spar against many load cases at once "
+    check = SparCheck(np.linspace(0, 1, 101), 2., np.full(100, 1e-8),
+                      np.full(100, 1e-6), 1e10, 1e9)
+    res = check.analyze(np.full((2, 101), 10.))
+    assert np.allclose(res["M"][:, 0], 20, rtol=1e-3)
+    assert np.allclose(res["w"][:, -1], 10*2.**4/8/1e10/1e-8, rtol=1e-3)
+
+    m, _ = loaded_wing()
+    sol = m.solve(verbosity=0)
+    check = SparCheck.from_wing(sol, m.wing)
+    cbar = sol(m.wing.planform.cbar).magnitude
+    W = sol(m.loading[0].W).to("N").magnitude
+    res = check.analyze(check.static_load(cbar, [W, W], [5., 10.]))
+    # the GP bounds shear, moment and deflection from above
+    assert res["stress ratio"][0] <= 1 + 1e-3
+    assert res["deflection ratio"][0] <= 1 + 1e-3
+    assert np.isclose(res["stress ratio"][1], 2*res["stress ratio"][0])
+    Ws = np.linspace(0.5, 1.5, 2000)*W
+    Ww = sol(m.wing.W).to("N").magnitude
+    cl = sol(m.loading[1].cl).magnitude
+    res = check.analyze(check.gust_load(cbar, Ws, Ww, 50., cl))
+    assert res["passed"].shape == (2000,) and res["passed"][0]
+
+def unloaded_wing():
+    " wing without structural load cases, for envelope_solve "
+    W = Wing()
+    W.substitutions[W.W] = 50
+    W.substitutions[W.planform.tau] = 0.115
+    fs = FlightState()
+    perf = W.flight_model(W, fs)
+    m = Model(perf.Cd, [W.W <= 0.5*fs.rho*fs.V**2*perf.CL*W.planform.S,
+                        W, fs, perf])
+    return m, W, fs
+
+def envelope_test():
+    " size a spar with only its active load cases "
+    cases = ([{"W": 100, "Nmax": n} for n in [2, 3, 4, 5]]
+             + [{"W": w, "Nmax": 4} for w in [60, 80, 110]]
+             + [{"W": 100, "v": 50, "cl": cl} for cl in [0.6, 0.8, 1.0]])
+    sol, report = envelope_solve(unloaded_wing, cases)
+    assert len(report["active"]) < len(cases)
+    assert not report["violated"][-1]
+
+    m, W, fs = unloaded_wing()
+    full = Model(m.cost, [m, [case_loading(W, fs, c) for c in cases]])
+    assert abs(sol["cost"]/full.solve(verbosity=0)["cost"] - 1) < 1e-3
+
+def vectorized_loading_test():
+    " several load cases in one vectorized SparLoading and GustL "
+    m, W, fs = unloaded_wing()
+    with Vectorize(3):
+        static = W.spar.loading(W, fs)
+    static.substitutions.update({static.W: [80, 100, 120],
+                                 static.Nmax: [5, 4, 3]})
+    with Vectorize(2):
+        gust = W.spar.gustloading(W, fs)
+    gust.substitutions.update({gust.W: [100, 100], gust.v: [40, 50],
+                               gust.cl: [0.6, 0.8]})
+    vectorized = Model(m.cost, [m, static, gust, gust.Ww == W.W])
+
+    cases = ([{"W": w, "Nmax": n} for w, n in [(80, 5), (100, 4), (120, 3)]]
+             + [{"W": 100, "v": v, "cl": cl} for v, cl in [(40, .6),
+                                                         (50, .8)]])
+    m, W, fs = unloaded_wing()
+    separate = Model(m.cost, [m, [case_loading(W, fs, c) for c in cases]])
+    cost = vectorized.solve(verbosity=0)["cost"]
+    assert abs(cost/separate.solve(verbosity=0)["cost"] - 1) < 1e-4
 
 def box_spar():
     " test wing models "
 
-    Wing.sparModel = BoxSpar
-    W = Wing()
+    W = Wing(sparModel=BoxSpar)
     W.substitutions[W.W] = 50
     W.substitutions[W.planform.tau] = 0.115
     fs = FlightState()
@@ -80,6 +180,10 @@ def box_spar():
 def test():
     " tests "
     wing_test()
+    richardson_test()
+    spar_check_test()
+    envelope_test()
+    vectorized_loading_test()
     box_spar()
 
 if __name__ == "__main__":
@@ -1,11 +1,17 @@
 " discretized beam model "
+import numpy as np
 from gpkit import Model, Variable, Vectorize
+from gpkitmodels.tools.spacing import node_spacing
 
 #pylint: disable=invalid-name
 
 class Beam(Model):
     """discretized beam bending model
 
+    qbarFun, SbarFun and MbarFun give values for the normalized loading,
+    shear and moment; passed to setup they override the class attributes
+    for this beam only.
+
     Upper Unbounded
     ---------------
     EIbar, dbar_tip
@@ -19,16 +25,30 @@ class Beam(Model):
     SbarFun = None
     MbarFun = None
 
-    def setup(self, N):
+    def setup(self, N, spacing=None, qbarFun=None, SbarFun=None,
+              MbarFun=None):
+        # kept on the instance: the docstring's "(if not qbarFun)" reads it
+        if qbarFun is not None:
+            self.qbarFun = qbarFun
+        if SbarFun is not None:
+            self.SbarFun = SbarFun
+        if MbarFun is not None:
+            self.MbarFun = MbarFun
+        qbarFun, SbarFun, MbarFun = self.qbarFun, self.SbarFun, self.MbarFun
 
         with Vectorize(N-1):
             EIbar = self.EIbar = Variable("\\bar{EI}", "-",
                              "normalized YM and moment of inertia")
-            dx = self.dx = Variable("dx", "-", "normalized length of element")
+            if spacing is None:
+                dx = Variable("dx", "-", "normalized length of element")
+            else:
+                dx = Variable("dx", np.diff(node_spacing(N, spacing)), "-",
+                              "normalized length of element")
+            self.dx = dx
 
         with Vectorize(N):
-            Sbar = Variable("\\bar{S}", self.SbarFun, "-", "normalized shear")
-            Mbar = Variable("\\bar{M}", self.MbarFun, "-", "normalized moment")
+            Sbar = Variable("\\bar{S}", SbarFun, "-", "normalized shear")
+            Mbar = Variable("\\bar{M}", MbarFun, "-", "normalized moment")
             th = Variable("\\theta", "-", "deflection slope")
             dbar = Variable("\\bar{\\delta}", "-", "normalized displacement")
             self.dbar_tip = dbar[-1]
@@ -39,16 +59,16 @@ class Beam(Model):
                             "Base deflection")
 
         constraints = []
-        if self.SbarFun is None:
+        if SbarFun is None:
             with Vectorize(N):
-                qbar = self.qbar = Variable("\\bar{q}", self.qbarFun, "-",
+                qbar = self.qbar = Variable("\\bar{q}", qbarFun, "-",
                                             "normalized loading")
             Sbartip = Variable("\\bar{S}_{tip}", 1e-10, "-", "Tip loading")
             constraints.extend([
                 Sbar[:-1] >= Sbar[1:] + 0.5*dx*(qbar[:-1] + qbar[1:]),
                 Sbar[-1] >= Sbartip])
 
-        if self.MbarFun is None:
+        if MbarFun is None:
             Mbartip = Variable("\\bar{M}_{tip}", 1e-10, "-", "Tip moment")
             constraints.extend([
                 Mbar[:-1] >= Mbar[1:] + 0.5*dx*(Sbar[:-1] + Sbar[1:]),
@@ -1,8 +1,26 @@
+" shared material models, built the first time they are used "
+import sys
+from gpkitmodels.lazy import lazy_module
 from .composite import CFRPFabric, CFRPUD, Kevlar
 from .foam import FoamHD, FoamLD
 
-cfrpfabric = CFRPFabric()
-cfrpud = CFRPUD()
-foamhd = FoamHD()
-foamld = FoamLD()
-kevlar = Kevlar()
+MATERIALS = {"cfrpfabric": CFRPFabric, "cfrpud": CFRPUD, "foamhd": FoamHD,
+             "foamld": FoamLD, "kevlar": Kevlar}
+__all__ = (["CFRPFabric", "CFRPUD", "Kevlar", "FoamHD", "FoamLD",
+            "MATERIALS", "SharedMaterial"] + sorted(MATERIALS))
+
+class SharedMaterial(object):
+    """class attribute standing in for a shared material model
+
+    `material = SharedMaterial("cfrpud")` in a component class body
+    resolves to gpkitmodels.GP.materials.cfrpud when first read, so
+    importing the component does not build the model. Assigning to the
+    attribute, on the class or on an instance, replaces it as usual.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        return getattr(sys.modules[__name__], self.name)
+
+lazy_module(__name__, MATERIALS)
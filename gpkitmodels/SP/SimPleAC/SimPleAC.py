@@ -1,7 +1,6 @@
 from __future__ import print_function
 from gpkit import Model, Variable, SignomialsEnabled, VarKey, units
 import numpy as np
-import matplotlib.pyplot as plt
 
 class SimPleAC(Model):
     def setup(self):
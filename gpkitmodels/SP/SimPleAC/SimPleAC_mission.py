@@ -3,6 +3,8 @@ from gpkit import Model, Variable, SignomialsEnabled, SignomialEquality, VarKey,
 
 # Importing atmospheric model
 from gpkitmodels.SP.atmosphere.atmosphere import Atmosphere
+from gpkitmodels.tools.batch import batch_localsolve, predicted_sweep
+from gpkitmodels.tools.pareto import pareto_front
 
 # SimPleAC with mission design and flight segments, and lapse rate and BSFC model (3.4.2)
 
@@ -204,10 +206,20 @@ class EngineP(Model):
 
         constraints = []
 
+        altitudes = getattr(state, 'altitudes', None)
+        if altitudes is None:
+            with SignomialsEnabled():
+                lapse = SignomialEquality(1, L + P_shaft_alt / self.engine['P_{shaft,max}'])
+        else:
+            # fixed altitudes fix the lapse, and 1 - L with it
+            h_ref = self.engine['h_{ref}'].key
+            h_ref = (self.engine.substitutions[h_ref]*h_ref.units).to('m').magnitude
+            lapse = P_shaft_alt == (1 - (0.937 * (altitudes/h_ref)**0.0922)**10) * self.engine['P_{shaft,max}']
+
         with SignomialsEnabled():
             constraints += [P_shaft <= P_shaft_alt,
                         L == (0.937 * (state['h']/self.engine['h_{ref}'])**0.0922)**10,
-                        SignomialEquality(1, L + P_shaft_alt / self.engine['P_{shaft,max}']),
+                        lapse,
                         (BSFC/self.engine['BSFC_{ref}'])**(0.1) >= 0.984*(P_shaft/P_shaft_alt)**-0.0346,
                         BSFC/self.engine['BSFC_{ref}'] >= 1.,
                         ]
@@ -215,7 +227,14 @@ class EngineP(Model):
 
 
 class Mission(Model):
-    def setup(self,aircraft,Nsegments):
+    """SimPleAC mission of Nsegments equal-range segments
+
+    altitudes, if given, fixes each segment's average altitude [m] and
+    looks up its atmosphere in the ISA table instead of fitting it. The
+    altitudes must climb; they fix each segment's climb and engine lapse,
+    so the only signomial left is the aircraft's fuel volume.
+    """
+    def setup(self,aircraft,Nsegments,altitudes=None):
         self.aircraft = aircraft
         W_f_m   = Variable('W_{f_m}','N','total mission fuel')
         t_m     = Variable('t_m','hr','total mission time')
@@ -230,7 +249,7 @@ class Mission(Model):
             W_f_s   = Variable('W_{f_s}','N', 'segment fuel burn')
             t_s     = Variable('t_s','hr','time spent in flight segment')
             R_s     = Variable('R_s','km','range flown in segment')
-            state   = Atmosphere()
+            state   = Atmosphere(altitudes)
             self.aircraftP = self.aircraft.dynamic(state)
 
         # Mission variables
@@ -242,6 +261,23 @@ class Mission(Model):
         TOfac      = Variable('T/O factor_m', '-','takeoff thrust factor')
         cost_index = Variable("C_m", '1/hr','hourly cost index')
 
+        if altitudes is None:
+            with SignomialsEnabled():
+                climb = SignomialEquality(h[1:Nsegments],h[:Nsegments-1] + t_s[1:Nsegments]*dhdt[1:Nsegments])
+        else:
+            altitudes = np.broadcast_to(np.asarray(altitudes, dtype=float),
+                                        (Nsegments,))
+            # end altitudes from the averages, h[0] = 2*havg[0] and
+            # h[i] = havg[i]**2/h[i-1], make each climb a constant
+            hend = [2.*altitudes[0]]
+            for havg_i in altitudes[1:]:
+                hend.append(havg_i**2/hend[-1])
+            if (np.diff(hend) <= 0).any():
+                raise ValueError("fixed segment altitudes must climb")
+            with Vectorize(Nsegments-1):
+                dh = Variable('\\Delta h', np.diff(hend), 'm', 'segment climb')
+            climb = t_s[1:Nsegments]*dhdt[1:Nsegments] == dh
+
         constraints = []
 
         # Setting up the mission
@@ -264,7 +300,7 @@ class Mission(Model):
                         dhdt >= 1.*units('m/hr'),
                         havg[0] == 0.5*h[0],
                         havg[1:Nsegments] == (h[1:Nsegments]*h[0:Nsegments-1])**(0.5),
-                        SignomialEquality(h[1:Nsegments],h[:Nsegments-1] + t_s[1:Nsegments]*dhdt[1:Nsegments]),
+                        climb,
 
                         # Thrust and fuel burn
                         W_f_s >= self.aircraftP.engineP['BSFC'] * self.aircraftP.engineP['P_{shaft}'] * t_s,
@@ -325,6 +361,86 @@ def test():
     })
     m.cost = m['W_{f_m}']*units('1/N') + m['C_m']*m['t_m']
     sol = m.localsolve(verbosity=0)
+    batch_test(m)
+    predicted_sweep_test(m)
+    pareto_test()
+    atmosphere_test()
+
+def batch_test(m):
+    res = batch_localsolve(m, {'Range_m': [2000, 3000, 2500, 3000],
+                               'W_{p_m}': [3000, 3000, 3500, 4000],
+                               'h_{cruise_m}': [5000, 5000, 4000, 5000]},
+                           outputs=['W_{f_m}', 't_m'])
+    assert res['converged'].all()
+    assert res['t_m'].shape == (4,)
+    assert (res['W_{f_m}'][1] < res['W_{f_m}'][3] and
+            res['W_{f_m}'][0] < res['W_{f_m}'][1])
+
+def predicted_sweep_test(m):
+    res = predicted_sweep(m, {'Range_m': np.linspace(2900, 3100, 25)},
+                          outputs=['W_{f_m}'], tol=1e-3, spot_check=4,
+                          localsolve=True)
+    assert res['converged'].all()
+    assert len(res.skipped()) > 0
+    assert np.nanmax(res['spot error']) < 1e-2
+    assert (np.diff(res['W_{f_m}']) > 0).all()
+
+def fuel_time_mission():
+    m = Mission(SimPleAC(), 4)
+    m.substitutions.update({
+        'h_{cruise_m}'   :5000*units('m'),
+        'Range_m'        :3000*units('km'),
+        'W_{p_m}'        :3000*units('N'),
+        '\\rho_{p_m}'    :1500*units('kg/m^3'),
+        'C_m'            :120*units('1/hr'),
+        'V_{min_m}'      :35*units('m/s'),
+        'T/O factor_m'   :2,
+    })
+    # without a top speed, minimum time has no optimum: fuel pays for ever
+    # faster segments
+    V_max = Variable("V_{max}", 60, "m/s", "maximum cruise speed")
+    m = Model(None, [m, m.aircraftP['V'] <= V_max])
+    return m, m['W_{f_m}']*units('1/N'), m['t_m']
+
+def pareto_test():
+    front = pareto_front(fuel_time_mission, n=5, refine=1, localsolve=True,
+                         outputs={'W_{f_m}': 'W_{f_m}'}, workers=2)
+    assert len(front['f1']) >= 5
+    assert (np.diff(front['f2']) > 0).all()
+    assert (np.diff(front['f1']) < 1e-6*front['f1'][:-1]).all()
+    weighted = pareto_front(fuel_time_mission, n=4, method='weighted',
+                            refine=0, localsolve=True, workers=1)
+    assert (np.diff(weighted['f1']) <= 1e-6*weighted['f1'][:-1]).all()
+
+def atmosphere_mission(Nsegments=4, altitudes=None):
+    m = Mission(SimPleAC(), Nsegments, altitudes)
+    m.substitutions.update({
+        'h_{cruise_m}'   :4000*units('m'),
+        'Range_m'        :3000*units('km'),
+        'W_{p_m}'        :3000*units('N'),
+        '\\rho_{p_m}'    :1500*units('kg/m^3'),
+        'C_m'            :120*units('1/hr'),
+        'V_{min_m}'      :35*units('m/s'),
+        'T/O factor_m'   :2,
+    })
+    m.cost = m['W_{f_m}']*units('1/N') + m['C_m']*m['t_m']
+    return m
+
+def climb_altitudes(Nsegments, h0=4000., dh=100.):
+    "average altitudes [m] of segments each climbing dh [m], ending at h0 first"
+    h = h0 + dh*np.arange(Nsegments)
+    return np.hstack([0.5*h[0], (h[1:]*h[:-1])**0.5])
+
+def atmosphere_test():
+    " on the same climb the ISA table matches the fitted atmosphere "
+    altitudes = climb_altitudes(4)
+    m = atmosphere_mission()
+    m.substitutions['h_{avg}'] = altitudes
+    sol = m.localsolve(verbosity=0)
+    fixed = atmosphere_mission(altitudes=altitudes)
+    fsol = fixed.localsolve(verbosity=0)
+    assert abs(fsol['cost']/sol['cost'] - 1) < 5e-3
+    assert abs(fsol(fixed['W_{f_m}'])/sol(m['W_{f_m}']) - 1) < 5e-3
 
 if __name__ == "__main__":
     test()
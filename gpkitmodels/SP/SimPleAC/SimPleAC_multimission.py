@@ -1,9 +1,11 @@
 from builtins import range
+from functools import partial
 import numpy as np
 from gpkit import Model, Variable, SignomialsEnabled, SignomialEquality, \
     VarKey, units, Vectorize, settings
 from gpkitmodels.SP.SimPleAC.SimPleAC_mission import Mission, SimPleAC
 from gpkitmodels.SP.atmosphere.atmosphere import Atmosphere
+from gpkitmodels.tools.decomposition import consensus_solve
 
 # SimPleAC with multimission design (updated 5/31/2019, by Berk Ozturk)
 
@@ -48,6 +50,30 @@ class Multimission(Model):
 
         return constraints, self.aircraft, self.missions
 
+def mission_subproblem(Nsegments, substitutions, fuel=True, time=False):
+    """one Mission with its own SimPleAC, for decomposed multimission solves
+
+    Returns the mission, with a cost of its fuel weight and/or time cost,
+    and the aircraft whose design the missions share.
+    """
+    m = Mission(SimPleAC(), Nsegments)
+    m.substitutions.update(substitutions)
+    cost = 0
+    if fuel:
+        cost += m['W_{f_m}']*units('1/N')
+    if time:
+        cost += m['C_m']*m['t_m']
+    m.cost = cost
+    return m, m.aircraft
+
+def decomposed_solve(Nsegments, substitutions, fuel, time, **kwargs):
+    """solves a multimission design by consensus between missions, each
+    solved in its own worker process; takes one substitution dict and
+    fuel/time cost flag per mission"""
+    builders = [partial(mission_subproblem, Nsegments, subs, f, t)
+                for subs, f, t in zip(substitutions, fuel, time)]
+    return consensus_solve(builders, **kwargs)
+
 def test():
     Nmissions = 2
     Nsegments = 4
@@ -67,6 +93,34 @@ def test():
     else:
         sol = m.localsolve(verbosity=0)
 
+def decomposition_test():
+    """checks decomposed_solve against the monolithic model, both missions
+    minimizing fuel; opt-in, since consensus takes tens of iterations"""
+    Nmissions = 2
+    Nsegments = 4
+    aircraft = SimPleAC()
+    m = Multimission(aircraft,Nmissions,Nsegments)
+    m.substitutions.update({
+        'h_{cruise_{mm}}':[5000*units('m'), 5000*units('m')],
+        'Range_{mm}'     :[3000*units('km'), 2000*units('km')],
+        'W_{p_{mm}}'     :[6250*units('N'),   8000*units('N')],
+        '\\rho_{p_{mm}}' :[1500*units('kg/m^3'), 2000*units('kg/m^3')],
+        'C_{mm}'         :[120*units('1/hr'), 360*units('1/hr')],
+    })
+
+    m.cost = (m.missions[0]['W_{f_m}'] + m.missions[1]['W_{f_m}'])*units('1/N')
+    sol = m.localsolve(verbosity=0)
+
+    subs = [{'h_{cruise_m}': 5000, 'Range_m': r, 'W_{p_m}': w,
+             '\\rho_{p_m}': rho, 'C_m': c, 'V_{min_m}': 25,
+             'T/O factor_m': 2}
+            for r, w, rho, c in [(3000, 6250, 1500, 120),
+                                 (2000, 8000, 2000, 360)]]
+    dsol = decomposed_solve(Nsegments, subs, [True, True], [False, False],
+                            workers=2)
+    assert dsol["converged"]
+    assert abs(dsol["costs"].sum()/sol["cost"] - 1) < 1e-2
+
 if __name__ == "__main__":
     Nmissions = 2
     Nsegments = 4
@@ -9,11 +9,14 @@ from gpfit.fit import fit
 import sys
 from gpkitmodels.GP.aircraft.wing.wing import Wing
 from gpkitmodels.GP.aircraft.prop.propeller import ActuatorProp
+from gpkitmodels.tools.fitdata import FitEvaluator
 import inspect
 import os
 
 GENERATE = True
 plt.rcParams.update({'font.size':15})
+DAE51_FIT = FitEvaluator(os.path.dirname(os.path.abspath(__file__)) + os.sep
+                         + os.pardir + os.sep + "dae51_fitdata.csv")
 
 def text_to_df(filename):
     "parse XFOIL polars and concatente data in DataFrame"
@@ -75,11 +78,8 @@ def fit_setup(Re_range):
 
 def return_fit(cl, re):
     "polar fit for the dae51 airfoil"
-    cd = (3.0902e14*cl**-.763161*re**-5.00624 
-        + 8.06832e-09*cl**6.32059*re**-0.810816 
-        + 2.65501*cl**42.1738*re**-2.87665 )**(1/6.1539)
     # SMA function, K=3, max RMS error = 0.09734
-    return cd
+    return DAE51_FIT(cl, re)
 
 def plot_fits(re, cnstr, x, y):
     "plot fit compared to data"
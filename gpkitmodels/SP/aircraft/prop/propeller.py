@@ -1,11 +1,13 @@
 " propeller model "
-from builtins import range
-from numpy import pi
-from gpkit import Model, Variable,Vectorize,parse_variables, SignomialsEnabled, SignomialEquality
+import numpy as np
+from numpy import pi, arange
+from gpkit import Model, Variable,Vectorize,parse_variables, SignomialsEnabled, SignomialEquality, ureg
 from gpkit.constraints.tight import Tight as TCS
 from gpfit.fit_constraintset import XfoilFit
 import os
-import pandas as pd
+from gpkitmodels.tools.fitdata import load_fitdata
+from gpkitmodels.tools.helpers import magnitude, shared_name
+from gpkitmodels.GP.aircraft.prop.propeller import ActuatorProp
 
 
 
@@ -49,8 +51,7 @@ class BladeElementPerf(Model):
         R       = static.R
         mu      = state.mu
         path = os.path.dirname(__file__)
-        fd = pd.read_csv(path + os.sep + "dae51_fitdata.csv").to_dict(
-            orient="records")[0]
+        fd = load_fitdata(path + os.sep + "dae51_fitdata.csv")
         c = static.c
         constraints = [TCS([Wa>=V + va]),
                         TCS([Wt + vt<=omega*r]),
@@ -81,6 +82,9 @@ class BladeElementPerf(Model):
 class BladeElementProp(Model):
     """ Performance for a propeller with multiple elements
 
+    The N elements are of equal length, centred at fixed fractions rbar of
+    the radius, so all element constraints are built as whole slices.
+
     Variables
     ---------
     Mtip        .5          [-]         Max tip mach number
@@ -90,22 +94,21 @@ class BladeElementProp(Model):
     T                       [lbf]       total thrust
     Q                       [N*m]       total torque
     """
+    def rbar(self, N, shape):
+        " element midpoint radii over R, shaped to broadcast against shape "
+        return ((arange(N) + 0.5)/N).reshape((N,) + (1,)*(len(shape) - 1))
+
     @parse_variables(__doc__, globals())
     def setup(self,static,  state, N=5):
+        self.static, self.state = static, state
         with Vectorize(N):
-            blade = BladeElementPerf(static, state)
-
+            blade = self.blade = BladeElementPerf(static, state)
 
         constraints = [blade.dr == static.R/(N),
                         blade.omega == omega,
-                        blade.r[0] == static.R/(2.*N)]
-
-        for n in range(1,N):
-            constraints += [TCS([blade.r[n] >= blade.r[n-1] + static.R/N]),
-                            blade.eta_i[n] == blade.eta_i[n-1],
-                            ]
-
-        constraints += [TCS([Q >= sum(blade.dQ)]),
+                        blade.r == static.R*self.rbar(N, blade.r.shape),
+                        blade.eta_i[1:] == blade.eta_i[:-1],
+                        TCS([Q >= sum(blade.dQ)]),
                         eta == state.V*T/(omega*Q),
                         blade.M[-1] <= Mtip,
                         static.T_m >= T,
@@ -116,3 +119,81 @@ class BladeElementProp(Model):
             constraints += [TCS([T <= sum(blade.dT)])]
 
         return constraints, blade
+
+
+def blade_element_x0(sol, actuator, prop, cl=0.5, eps=0.03):
+    """starting point for a BladeElementProp from a solved ActuatorProp
+
+    The actuator disk's thrust, rotation rate and inviscid efficiency set
+    a uniform axial induced velocity; each element's tangential induced
+    velocity, tip loss and circulation then follow from the blade element
+    constraints, with chords sized for lift coefficient cl and drag to
+    lift ratio eps.
+    """
+    si = lambda v, u: float(sol(v).to(u).magnitude)
+    const = lambda v: float(np.mean(magnitude(prop.substitutions[v])))
+    blade, N = prop.blade, prop.blade.r.shape[0]
+    R, V = si(actuator.static.R, "m"), si(actuator.state.V, "m/s")
+    rho, mu = si(actuator.state.rho, "kg/m^3"), si(actuator.state.mu, "Pa*s")
+    omega, T = si(actuator.omega, "rad/s"), si(actuator.T, "N")
+    B, a = const(blade.B), const(blade.a)
+
+    r = R*prop.rbar(N, (N,))
+    dr = np.full(N, R/N)
+    va = np.full(N, V*(1./si(actuator.etai, "dimensionless") - 1))
+    Wa = V + va
+    vt = (omega*r - np.sqrt(np.maximum((omega*r)**2 - 4*va*Wa, 0)))/2
+    Wt = omega*r - vt
+    Wr = np.hypot(Wa, Wt)
+    lam_w = r/R*Wa/Wt
+    f = B/(2*lam_w)*(1 - r/R)
+    F = 2/pi*np.arccos(np.exp(-f))
+    G = 4*pi*r*vt*F*np.sqrt(1 + (4*lam_w*R/(pi*B*r))**2)/B
+    c = 2*G/(Wr*cl)
+    dT = rho*B*G*(Wt - eps*Wa)*dr
+    dQ = rho*B*G*(Wa + eps*Wt)*r*dr
+    values = [
+        (blade.r, r, "m"), (blade.dr, dr, "m"), (blade.va, va, "m/s"),
+        (blade.vt, vt, "m/s"), (blade.Wa, Wa, "m/s"), (blade.Wt, Wt, "m/s"),
+        (blade.Wr, Wr, "m/s"), (blade.G, G, "m^2/s"),
+        (blade.lam_w, lam_w, "-"), (blade.f, f, "-"), (blade.F, F, "-"), (blade.cl, np.full(N, cl), "-"),
+        (blade.eps, np.full(N, eps), "-"), (blade.cd, np.full(N, eps*cl), "-"),
+        (blade.dT, dT, "N"), (blade.dQ, dQ, "N*m"), (blade.M, Wr/a, "-"),
+        (blade.Re, Wr*c*rho/mu, "-"), (blade.AR_b, R/c, "-"),
+        (blade.eta_i, V/(omega*r)*Wt/Wa, "-"),
+        (blade.omega, np.full(N, omega), "rad/s"), (prop.static.c, c, "m"),
+        (prop.omega, omega, "rad/s"), (prop.T, T, "N"),
+        (prop.Q, dQ.sum(), "N*m"), (prop.eta, V*T/(omega*dQ.sum()), "-")]
+    x0 = {}
+    for var, value, unit in values:
+        vk = var.key
+        if vk.units:
+            value = value*ureg(unit).to(vk.units).magnitude
+        x0[vk] = value
+    return x0
+
+def staged_localsolve(build, verbosity=0, **kwargs):
+    """solves a model with an ActuatorProp, then with a BladeElementProp
+    started from that solution
+
+    Arguments
+    ---------
+    build: function
+        build(prop_flight_model) returns (model, prop): the model with its
+        cost set, built with the given propeller flight model, and that
+        flight model's instance
+    kwargs:
+        passed to the blade element localsolve
+
+    Free variables of the two models that share a name and model lineage,
+    such as a motor's, start at their actuator disk values.
+    """
+    model, actuator = build(ActuatorProp)
+    sol = model.solve(verbosity=verbosity)
+    model, prop = build(BladeElementProp)
+    shared = dict((shared_name(vk), value)
+                  for vk, value in sol["freevariables"].items())
+    x0 = dict((vk, shared[shared_name(vk)]) for vk in model.varkeys
+              if shared_name(vk) in shared and vk not in model.substitutions)
+    x0.update(blade_element_x0(sol, actuator, prop))
+    return model.localsolve(verbosity=verbosity, x0=x0, **kwargs)
@@ -3,7 +3,20 @@ from gpkit import Model, Variable, SignomialsEnabled, SignomialEquality, VarKey,
 from gpkit.constraints.bounded import Bounded
 from gpkit import Vectorize
 import numpy as np
-import matplotlib.pyplot as plt
+
+# International Standard Atmosphere troposphere, tabulated every 100 m
+ISA_H = np.linspace(0, 11000, 111)                                   # [m]
+ISA_T = 288.15 - 0.0065*ISA_H                                        # [K]
+ISA_RHO = 1.225*(ISA_T/288.15)**(9.80665/287.053/0.0065 - 1)         # [kg/m^3]
+ISA_MU = 1.458e-6*ISA_T**1.5/(ISA_T + 110.4)                         # [kg/m/s]
+
+def isa_properties(h):
+    "density [kg/m^3] and dynamic viscosity [kg/m/s] at altitudes h [m]"
+    h = np.asarray(h, dtype=float)
+    if (h < ISA_H[0]).any() or (h > ISA_H[-1]).any():
+        raise ValueError("altitudes must be between %g and %g m"
+                         % (ISA_H[0], ISA_H[-1]))
+    return np.interp(h, ISA_H, ISA_RHO), np.interp(h, ISA_H, ISA_MU)
 
 
 class Atmosphere(Model):
@@ -13,8 +26,17 @@ class Atmosphere(Model):
     The rest are commented, to be used with modeler's discretion!
     Boundedness will vary depending on model application for other variables.
     Signomial equalities are fast and reliable here!
+
+    Passing fixed altitudes h [m] (a scalar, or one per element when
+    vectorized) instead fixes rho and mu to values interpolated from the
+    standard atmosphere table, with monomial equalities in place of the
+    SignomialEqualities. The altitudes are kept as self.altitudes, for
+    models that can then drop their own signomials in altitude.
     """
-    def setup(self):
+    def setup(self, h=None):
+        if h is not None:
+            return self.fixed_altitude(h)
+
         # Env. constants
         alt_top = Variable('h_{top}',10000,'m','highest altitude valid')
         #a_MSL   = Variable('a_{MSL}',340.20,'m/s','Speed of sound at MSL')
@@ -56,6 +78,22 @@ class Atmosphere(Model):
 
         return constraints
 
+    def fixed_altitude(self, h):
+        "rho and mu looked up in the ISA table for fixed altitudes h [m]"
+        rho_isa, mu_isa = isa_properties(h)
+        self.altitudes = np.asarray(h, dtype=float)
+        h_fixed = Variable('h_{fixed}', h, 'm', 'fixed altitude')
+        rho_fixed = Variable('\\rho_{ISA}', rho_isa, 'kg/m^3',
+                             'standard atmosphere density', pr=5.)
+        mu_fixed = Variable('\\mu_{ISA}', mu_isa, 'kg/m/s',
+                            'standard atmosphere dynamic viscosity', pr=4.)
+
+        alt = Variable('h','m','altitude')
+        mu  = Variable('\\mu', "kg/m/s", 'dynamic viscosity', pr=4.)
+        rho = Variable("\\rho", "kg/m^3", "density of air", pr=5.)
+
+        return [alt == h_fixed, mu == mu_fixed, rho == rho_fixed]
+
 if __name__ == "__main__":
     m = Atmosphere()
     m.substitutions.update({'h':5000*units('m')})
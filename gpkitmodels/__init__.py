@@ -1,3 +1,9 @@
-from gpkit import Variable
-g = Variable("g", 9.81, "m/s^2", "earth surface gravitational acceleration",
-             constant=True)
+from .lazy import lazy_module
+
+def _g():
+    "builds the shared gravitational constant g"
+    from gpkit import Variable
+    return Variable("g", 9.81, "m/s^2",
+                    "earth surface gravitational acceleration", constant=True)
+
+lazy_module(__name__, {"g": _g})
@@ -0,0 +1,34 @@
+" modules whose attributes are built on first access "
+import sys
+import types
+
+class LazyModule(types.ModuleType):
+    """stand-in for a module that builds some attributes on first access
+
+    Unlike a module-level __getattr__ (python 3.7+), this works on python 2
+    and 3. Built values are stored on the module, so each is built once;
+    the replaced module is kept alive so that its globals stay valid.
+    """
+    def __init__(self, module, lazy):
+        types.ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self._module = module
+        self._lazy = lazy
+
+    def __getattr__(self, name):
+        lazy = self.__dict__.get("_lazy", {})
+        if name not in lazy:
+            raise AttributeError("module %r has no attribute %r"
+                                 % (self.__name__, name))
+        value = lazy[name]()
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self._lazy))
+
+def lazy_module(name, lazy):
+    """replaces module name in sys.modules with a LazyModule that builds
+    each attribute of lazy, {name: function of no arguments}, when first
+    read; call it at the end of the module"""
+    sys.modules[name] = LazyModule(sys.modules[name], lazy)
@@ -0,0 +1,55 @@
+" building many model variants from a pool of threads, one at a time "
+import threading
+from multiprocessing.pool import ThreadPool
+
+BUILD_LOCK = threading.RLock()
+
+def build(builder, *args, **kwargs):
+    """calls builder(*args, **kwargs) while holding BUILD_LOCK
+
+    gpkit keeps the state that names and shapes variables in class
+    attributes shared by every thread: NamedVariables' lineage, model
+    counters and current variables, Vectorize's dimensions and
+    SignomialsEnabled's flag. Each is set on entering a model's setup (or
+    a with block inside it) and read by every Variable created until it
+    exits, so two setups that interleave give their variables each
+    other's lineage and shape; the lock therefore spans the whole call.
+    Builders should only construct models, leaving other work to run
+    outside the lock. Configure variants through setup arguments, e.g.
+    Wing(sparModel=BoxSpar) or Propulsor(prop_flight_model=
+    BladeElementProp), never by assigning class attributes.
+    """
+    with BUILD_LOCK:
+        return builder(*args, **kwargs)
+
+def build_concurrently(builders, after=None, workers=None):
+    """builds each zero-argument builder from a thread pool
+
+    The builds themselves run one at a time under BUILD_LOCK; only after,
+    applied to each result as soon as it is built, runs alongside them.
+
+    Arguments
+    ---------
+    builders: list of functions
+        each returns a model (or anything else built from gpkit models)
+    after: function
+        applied to each built result outside of BUILD_LOCK, e.g. to solve
+        it or to post-process its solution
+    workers: int
+        number of threads; defaults to the number of cpus
+
+    Returns
+    -------
+    list of results, in the order of builders
+    """
+    def job(builder):
+        "build under the lock, then post-process unlocked"
+        result = build(builder)
+        return after(result) if after else result
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(job, builders, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
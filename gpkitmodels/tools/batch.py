@@ -0,0 +1,236 @@
+" solving one model over many substitution sets "
+from __future__ import print_function
+from builtins import range
+import numpy as np
+from gpkitmodels.tools.helpers import magnitude
+
+class BatchResult(dict):
+    """columnar store of batch solve results
+
+    Maps each substituted variable, each requested output and the
+    "cost", "converged" and "iterations" columns to an array with one row
+    per substitution set; failed points hold NaN. predicted_sweep adds
+    "predicted" and "spot error" columns.
+    """
+    def failed(self):
+        "indices of the substitution sets that did not solve"
+        return np.nonzero(~self["converged"])[0]
+
+    def skipped(self):
+        "indices of the points predicted_sweep predicted instead of solving"
+        return np.nonzero(self.get("predicted", np.zeros(0, bool)))[0]
+
+def nearest(logx, solved, i):
+    "index of the solved point closest to point i in log space"
+    if not solved:
+        return None
+    d = ((logx[solved] - logx[i])**2).sum(axis=1)
+    return solved[int(np.argmin(d))]
+
+def batch_localsolve(model, substitutions, outputs=(), verbosity=0,
+                     **kwargs):
+    """localsolve model once for each row of substitutions
+
+    Arguments
+    ---------
+    model: gpkit Model
+        built once; only its substitutions change between solves
+    substitutions: dict
+        {variable or name: sequence of n values}, one column per variable
+    outputs: list of variables or names
+        solution values to store for each point
+    kwargs:
+        passed to localsolve; an x0 starts the points with no converged
+        neighbour yet, e.g. from staged_localsolve's actuator disk stage
+
+    Each point is warm started (x0) from the free variables of the
+    converged point whose substitutions are closest in log space. The
+    model's own substitutions are restored afterwards.
+
+    Only the Model is built once: gpkit folds substitutions into the
+    program it compiles, so each point still compiles its own SP, and
+    the warm start is all that carries over between points.
+
+    Returns
+    -------
+    BatchResult of arrays of length n
+    """
+    keys = list(substitutions)
+    columns = [magnitude(substitutions[k]) for k in keys]
+    n = len(columns[0])
+    if any(len(c) != n for c in columns):
+        raise ValueError("substitution columns differ in length")
+    logx = np.log(np.abs(np.array(columns, dtype=float).T) + 1e-300)
+
+    result = BatchResult(zip(keys, columns))
+    result["cost"] = np.full(n, np.nan)
+    result["converged"] = np.zeros(n, dtype=bool)
+    result["iterations"] = np.zeros(n, dtype=int)
+    for out in outputs:
+        result[out] = None
+
+    original = dict((k, model.substitutions[k]) for k in keys
+                    if k in model.substitutions)
+    solved, x0s = [], {None: kwargs.pop("x0", None)}
+    try:
+        for i in range(n):
+            model.substitutions.update(dict((k, c[i])
+                                            for k, c in zip(keys, columns)))
+            near = nearest(logx, solved, i)
+            try:
+                sol = model.localsolve(verbosity=verbosity,
+                                       x0=x0s.get(near), **kwargs)
+            except (RuntimeWarning, ValueError):
+                continue
+            solved.append(i)
+            x0s[i] = sol["freevariables"]
+            result["converged"][i] = True
+            result["cost"][i] = magnitude(sol["cost"])
+            result["iterations"][i] = len(model.program.gps)
+            for out in outputs:
+                value = magnitude(sol(out))
+                if result[out] is None:
+                    result[out] = np.full((n,) + value.shape, np.nan)
+                result[out][i] = value
+    finally:
+        for k in keys:
+            if k in original:
+                model.substitutions[k] = original[k]
+            else:
+                del model.substitutions[k]
+    for out in outputs:
+        if result[out] is None:
+            result[out] = np.full(n, np.nan)
+    return result
+
+def predicted_sweep(model, substitutions, outputs=(), tol=1e-3,
+                    spot_check=10, localsolve=False, verbosity=0, **kwargs):
+    """sweeps model over rows of substitutions, solving only the points
+    that cannot be predicted from earlier solves
+
+    The log cost is extrapolated from the last solved point with its
+    sensitivities to the swept constants, and the log of each output
+    with its derivative along the step between the last two solves. The
+    error of a prediction is taken as quadratic in the log-space step,
+    scaled from each quantity's realized error at the last solve, and a
+    point is solved whenever that estimate exceeds tol. Every
+    spot_check-th predicted point is solved anyway, recording the
+    realized error and recalibrating the estimate.
+
+    Arguments
+    ---------
+    model: gpkit Model
+        built once; only its substitutions change between solves
+    substitutions: dict
+        {variable or name: sequence of n values}, ordered so that
+        neighbouring rows are close, as in a dense sweep
+    outputs: list of variables or names
+        values to store for each point; they must stay positive
+    tol: float
+        largest estimated relative error of a predicted point
+    localsolve: bool
+        solve with localsolve, warm started from the last solved point
+    kwargs:
+        passed to solve or localsolve
+
+    Returns
+    -------
+    BatchResult of arrays of length n, as batch_localsolve's, with a
+    "predicted" column marking the points that were not solved and a
+    "spot error" column of realized relative errors at spot checks
+    """
+    keys = list(substitutions)
+    columns = [magnitude(substitutions[k]) for k in keys]
+    n = len(columns[0])
+    if any(len(c) != n for c in columns):
+        raise ValueError("substitution columns differ in length")
+    logx = np.log(np.abs(np.array(columns, dtype=float).T) + 1e-300)
+
+    result = BatchResult(zip(keys, columns))
+    result["cost"] = np.full(n, np.nan)
+    result["converged"] = np.zeros(n, dtype=bool)
+    result["iterations"] = np.zeros(n, dtype=int)
+    result["predicted"] = np.zeros(n, dtype=bool)
+    result["spot error"] = np.full(n, np.nan)
+    for out in outputs:
+        result[out] = None
+
+    def store(i, logcost, logys):
+        "records point i from log values"
+        result["converged"][i] = True
+        result["cost"][i] = np.exp(logcost)
+        for out, logy in zip(outputs, logys):
+            if result[out] is None:
+                result[out] = np.full((n,) + logy.shape, np.nan)
+            result[out][i] = np.exp(logy)
+
+    original = dict((k, model.substitutions[k]) for k in keys
+                    if k in model.substitutions)
+    solve = model.localsolve if localsolve else model.solve
+    base = secant = curvature = x0 = None
+    npredicted = 0
+    try:
+        for i in range(n):
+            prediction = None
+            if base is not None and (secant is not None or not outputs):
+                j, logcost, sens, logys = base
+                step = logx[i] - logx[j]
+                h2 = step.dot(step)
+                prediction = [logcost + sens.dot(step)] + [
+                    logy + np.tensordot(step, d, 1)
+                    for logy, d in zip(logys, secant or [])]
+                if curvature is not None and max(curvature)*h2 <= tol:
+                    npredicted += 1
+                    if npredicted % spot_check:
+                        store(i, prediction[0], prediction[1:])
+                        result["predicted"][i] = True
+                        continue
+                else:
+                    npredicted = 0
+            model.substitutions.update(dict((k, c[i])
+                                            for k, c in zip(keys, columns)))
+            try:
+                if localsolve:
+                    sol = solve(verbosity=verbosity, x0=x0, **kwargs)
+                else:
+                    sol = solve(verbosity=verbosity, **kwargs)
+            except (RuntimeWarning, ValueError):
+                continue
+            x0 = sol["freevariables"]
+            sens = sol["sensitivities"]["constants"]
+            solved = [np.log(float(magnitude(sol["cost"])))] + [
+                np.log(magnitude(sol(out))) for out in outputs]
+            store(i, solved[0], solved[1:])
+            result["iterations"][i] = (len(model.program.gps) if localsolve
+                                       else 1)
+            if prediction is not None:
+                errors = [np.abs(p - s).max()
+                          for p, s in zip(prediction, solved)]
+                if npredicted and not npredicted % spot_check:
+                    result["spot error"][i] = np.exp(max(errors)) - 1
+                if h2 > 0:
+                    curvature = [e/h2 for e in errors]
+            if base is not None:
+                step = logx[i] - logx[base[0]]
+                h2 = step.dot(step)
+                if h2 > 0:
+                    secant = [np.multiply.outer(step, s - logy)/h2
+                              for s, logy in zip(solved[1:], base[3])]
+            base = (i, solved[0],
+                    np.array([float(magnitude(sens[k])) for k in keys]),
+                    solved[1:])
+    finally:
+        for k in keys:
+            if k in original:
+                model.substitutions[k] = original[k]
+            else:
+                del model.substitutions[k]
+    for out in outputs:
+        if result[out] is None:
+            result[out] = np.full(n, np.nan)
+    if verbosity > 0:
+        print("predicted sweep: %d of %d points predicted, largest spot "
+              "check error %.2g" % (result["predicted"].sum(), n,
+                                    np.nanmax(np.append(
+                                        result["spot error"], 0))))
+    return result
@@ -0,0 +1,326 @@
+""" times construction, compilation and solution of the models in TESTS
+
+Usage
+-----
+python -m gpkitmodels.tools.benchmark --output bench.json
+python -m gpkitmodels.tools.benchmark --baseline bench.json --threshold 1.3
+
+Each case is built and solved at every discretization in its list of N.
+Compile time is the time to form the GP or SP; the solve time includes
+forming it again. Consensus cases (decomposed_multimission) are solved
+with consensus_solve, whose solve time includes building the subproblems
+in their worker processes. Results are written as JSON, and when a baseline from
+an earlier run is given, any time more than threshold times its baseline
+value, or any increase in SP iterations beyond iter_threshold, is
+reported and makes the run exit with status 1.
+"""
+from __future__ import print_function
+from builtins import range
+import argparse
+import json
+import platform
+import sys
+import time
+from gpkit import Model, Variable, units, settings
+
+def wing(N, spar=None):
+    "wing with gust and static spar loading, as in wing_test"
+    from gpkitmodels.GP.aircraft.wing.wing import Wing
+    from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+    W = Wing(N, sparModel=spar or Wing.sparModel)
+    W.substitutions[W.W] = 50
+    W.substitutions[W.planform.tau] = 0.115
+    fs = FlightState()
+    perf = W.flight_model(W, fs)
+    loading = [W.spar.loading(W, fs), W.spar.gustloading(W, fs)]
+    for l in loading:
+        l.substitutions["W"] = 100
+        if settings["default_solver"] == "cvxopt":
+            for v in ["Mtip", "Stip", "wroot", "throot"]:
+                l.substitutions[v] = 1e-2
+    return Model(perf.Cd, [
+        loading[1].v == fs.V,
+        loading[1].cl == perf.CL,
+        loading[1].Ww == W.W,
+        loading[1].Ww <= fs.qne*perf.CL*W.planform.S,
+        W, fs, perf, loading]), "solve", {}
+
+def boxspar_wing(N):
+    "wing with a box spar"
+    from gpkitmodels.GP.aircraft.wing.boxspar import BoxSpar
+    return wing(N, BoxSpar)
+
+def empennage(N):
+    "empennage with tail boom bending, as in tail_tests.test_emp"
+    from gpkitmodels.GP.aircraft.tail.empennage import Empennage
+    from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+    Sw = Variable("S_w", 50, "ft**2", "wing area")
+    bw = Variable("b_w", 20, "ft", "wing span")
+    cmac = Variable("cmac", 15, "in", "wing MAC")
+    emp = Empennage(N)
+    fs = FlightState()
+    emp.substitutions.update({emp.W: 10, emp.tailboom.l: 5,
+                              emp.htail.planform.AR: 4,
+                              emp.vtail.planform.AR: 4,
+                              emp.htail.planform.tau: 0.08,
+                              emp.vtail.planform.tau: 0.08,
+                              emp.vtail.Vv: 0.04,
+                              emp.htail.Vh: 0.4,
+                              emp.htail.mh: 0.01})
+    htperf = emp.htail.flight_model(emp.htail, fs)
+    vtperf = emp.vtail.flight_model(emp.vtail, fs)
+    tbperf = emp.tailboom.flight_model(emp.tailboom, fs)
+    hbend = emp.tailboom.tailLoad(emp.tailboom, emp.htail, fs)
+    vbend = emp.tailboom.tailLoad(emp.tailboom, emp.vtail, fs)
+    m = Model(htperf.Cd + vtperf.Cd + tbperf.Cf,
+              [emp.vtail.lv == emp.tailboom.l, emp.htail.lh == emp.tailboom.l,
+               emp.htail.Vh <= emp.htail.planform.S*emp.htail.lh/Sw/cmac,
+               emp.vtail.Vv <= emp.vtail.planform.S*emp.vtail.lv/Sw/bw,
+               fs, emp, htperf, vtperf, tbperf, hbend, vbend])
+    if settings["default_solver"] == "cvxopt":
+        for l in [hbend, vbend]:
+            for v in ["\\bar{M}_{tip}", "\\bar{\\delta}_{root}",
+                      "\\theta_{root}"]:
+                m.substitutions[l[v]] = 1e-3
+    return m, "solve", {"use_leqs": False}
+
+def fuselage(N):
+    "elliptical fuselage, as in test_fuselage"
+    from gpkitmodels.GP.aircraft.fuselage.elliptical_fuselage import Fuselage
+    from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+    f = Fuselage()
+    fs = FlightState()
+    faero = f.flight_model(f, fs)
+    f.substitutions[f.Vol] = 1.33
+    return Model(f.W*faero.Cd, [f, fs, faero]), "solve", {}
+
+def actuator_prop(N):
+    "actuator disk propeller, as in prop_test"
+    from gpkitmodels.GP.aircraft.prop.propeller import Propeller, ActuatorProp
+    from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+    fs = FlightState()
+    p = Propeller()
+    pp = ActuatorProp(p, fs)
+    m = Model(1/pp.eta + p.W/(100.*units("lbf")) + pp.Q/(100.*units("N*m")),
+              [fs, p, pp])
+    m.substitutions.update({"rho": 1.225, "V": 50, "T": 100, "omega": 1000})
+    return m, "solve", {}
+
+def blade_element_prop(N):
+    "blade element propeller with N elements, as in prop_test"
+    from gpkitmodels.GP.aircraft.prop.propeller import Propeller
+    from gpkitmodels.SP.aircraft.prop.propeller import BladeElementProp
+    from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+    fs = FlightState()
+    p = Propeller(N=N)
+    pp = BladeElementProp(p, fs, N=N)
+    pp.substitutions[pp.T] = 100
+    m = Model(1./pp.eta + pp.Q/(1000.*units("N*m")) + p.T_m/(1000*units('N')),
+              [fs, p, pp])
+    return m, "localsolve", {"iteration_limit": 400}
+
+def propulsor(N, prop_flight_model=None):
+    "motor and propeller, as in motor_test"
+    from gpkitmodels.GP.aircraft.motor.motor import Propulsor
+    from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+    fs = FlightState()
+    p = Propulsor(prop_flight_model=prop_flight_model)
+    pp = p.flight_model(p, fs)
+    pp.substitutions[pp.prop.T] = 100
+    m = Model(pp.motor.Pelec/(1000*units('W')) + p.W/(1000*units('lbf')),
+              [fs, p, pp])
+    if prop_flight_model:
+        return m, "localsolve", {"use_leqs": False}
+    return m, "solve", {}
+
+def blade_element_propulsor(N):
+    "motor and blade element propeller"
+    from gpkitmodels.SP.aircraft.prop.propeller import BladeElementProp
+    return propulsor(N, BladeElementProp)
+
+def simpleac(N):
+    "SimPleAC minimizing fuel weight"
+    from gpkitmodels.SP.SimPleAC.SimPleAC import SimPleAC
+    m = SimPleAC()
+    m.cost = m['W_f']
+    return m, "localsolve", {}
+
+def mission(N):
+    "SimPleAC Mission with N flight segments"
+    from gpkitmodels.SP.SimPleAC.SimPleAC_mission import Mission, SimPleAC
+    m = Mission(SimPleAC(), N)
+    m.substitutions.update({
+        'h_{cruise_m}': 5000*units('m'),
+        'Range_m': 3000*units('km'),
+        'W_{p_m}': 3000*units('N'),
+        '\\rho_{p_m}': 1500*units('kg/m^3'),
+        'C_m': 120*units('1/hr'),
+        'V_{min_m}': 35*units('m/s'),
+        'T/O factor_m': 2,
+    })
+    m.cost = m['W_{f_m}']*units('1/N') + m['C_m']*m['t_m']
+    return m, "localsolve", {}
+
+def fixed_altitude_mission(N):
+    """mission(N) with segments at fixed, climbing altitudes, its
+    atmosphere from the ISA table, leaving one signomial"""
+    from gpkitmodels.SP.SimPleAC.SimPleAC_mission import (Mission, SimPleAC,
+                                                          climb_altitudes)
+    m = Mission(SimPleAC(), N, climb_altitudes(N, 5000.))
+    m.substitutions.update({
+        'h_{cruise_m}': 5000*units('m'),
+        'Range_m': 3000*units('km'),
+        'W_{p_m}': 3000*units('N'),
+        '\\rho_{p_m}': 1500*units('kg/m^3'),
+        'C_m': 120*units('1/hr'),
+        'V_{min_m}': 35*units('m/s'),
+        'T/O factor_m': 2,
+    })
+    m.cost = m['W_{f_m}']*units('1/N') + m['C_m']*m['t_m']
+    return m, "localsolve", {}
+
+def multimission(N):
+    "SimPleAC Multimission with N missions of 4 segments"
+    from gpkitmodels.SP.SimPleAC.SimPleAC_multimission import (Multimission,
+                                                               SimPleAC)
+    m = Multimission(SimPleAC(), N, 4)
+    m.substitutions.update({
+        'h_{cruise_{mm}}': [5000]*N,
+        'Range_{mm}': [3000 - 1000*i/max(N - 1, 1) for i in range(N)],
+        'W_{p_{mm}}': [6250 + 1750*i/max(N - 1, 1) for i in range(N)],
+        'C_{mm}': [120]*N,
+    })
+    m.cost = sum(mi['W_{f_m}'] for mi in m.missions)*units('1/N')
+    return m, "localsolve", {}
+
+def decomposed_multimission(N):
+    """N SimPleAC missions solved by consensus, one worker process each;
+    each iteration's missions solve in parallel, but the number of
+    iterations grows with N, so even with N cpus the solve time does too"""
+    from functools import partial
+    from gpkitmodels.SP.SimPleAC.SimPleAC_multimission import (
+        mission_subproblem)
+    builders = [partial(mission_subproblem, 4, {
+        'h_{cruise_m}': 5000, 'Range_m': 3000 - 1000*i/max(N - 1, 1),
+        'W_{p_m}': 6250 + 1750*i/max(N - 1, 1), '\\rho_{p_m}': 1500,
+        'C_m': 120, 'V_{min_m}': 25, 'T/O factor_m': 2}) for i in range(N)]
+    return builders, "consensus", {"workers": N}
+
+# name: (builder, discretizations N)
+CASES = {
+    "wing": (wing, [5, 10, 20]),
+    "boxspar_wing": (boxspar_wing, [5, 10, 20]),
+    "empennage": (empennage, [2, 5, 10]),
+    "fuselage": (fuselage, [None]),
+    "actuator_prop": (actuator_prop, [None]),
+    "blade_element_prop": (blade_element_prop, [5, 10, 20, 50]),
+    "propulsor": (propulsor, [None]),
+    "blade_element_propulsor": (blade_element_propulsor, [None]),
+    "simpleac": (simpleac, [None]),
+    "mission": (mission, [4, 8]),
+    "fixed_altitude_mission": (fixed_altitude_mission, [4, 8]),
+    "multimission": (multimission, [2, 4]),
+    "decomposed_multimission": (decomposed_multimission, [1, 2, 4]),
+}
+
+def run_case(builder, N, repeat=1):
+    """best-of-repeat timings [s] and the SP (or consensus) iteration count
+    for one case"""
+    from gpkitmodels.tools.decomposition import consensus_solve
+    best = {}
+    for _ in range(repeat):
+        start = time.time()
+        m, method, kwargs = builder(N)
+        built = time.time()
+        if method == "solve":
+            m.gp()
+        elif method == "localsolve":
+            m.sp()
+        compiled = time.time()
+        if method == "consensus":
+            iterations = consensus_solve(m, verbosity=0,
+                                         **kwargs)["iterations"]
+        else:
+            getattr(m, method)(verbosity=0, **kwargs)
+            iterations = (len(m.program.gps) if method == "localsolve"
+                          else 1)
+        solved = time.time()
+        times = {"construct": built - start, "compile": compiled - built,
+                 "solve": solved - compiled}
+        for k, v in times.items():
+            best[k] = min(best.get(k, v), v)
+    best["iterations"] = iterations
+    return best
+
+def run(cases=None, repeat=1, verbosity=1):
+    "{case: {N: results}} for the named cases, or all of CASES"
+    results = {}
+    for name in cases or sorted(CASES):
+        builder, Ns = CASES[name]
+        results[name] = {}
+        for N in Ns:
+            res = run_case(builder, N, repeat)
+            results[name][str(N)] = res
+            if verbosity > 0:
+                print("%-24s N=%-5s construct %7.3fs  compile %7.3fs  solve "
+                      "%7.3fs  %d iterations" % (name, N, res["construct"],
+                                                 res["compile"], res["solve"],
+                                                 res["iterations"]))
+    return results
+
+def compare(results, baseline, threshold=1.25, iter_threshold=0,
+            min_time=0.05):
+    """list of regressions of results against a baseline
+
+    A time regresses if it exceeds threshold times its baseline value and
+    min_time seconds; iterations regress if they grow by more than
+    iter_threshold. Cases or N missing from the baseline are skipped.
+    """
+    regressions = []
+    for name, byN in results.items():
+        for N, res in byN.items():
+            base = baseline.get(name, {}).get(N)
+            if base is None:
+                continue
+            for k in ["construct", "compile", "solve"]:
+                if res[k] > max(threshold*base[k], min_time):
+                    regressions.append("%s N=%s %s: %.3fs vs %.3fs baseline"
+                                       % (name, N, k, res[k], base[k]))
+            if res["iterations"] > base["iterations"] + iter_threshold:
+                regressions.append("%s N=%s iterations: %d vs %d baseline"
+                                   % (name, N, res["iterations"],
+                                      base["iterations"]))
+    return regressions
+
+def main(argv=None):
+    "command line entry point; returns the exit status"
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("cases", nargs="*", help="cases to run, default all")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="allowed ratio of time to baseline time")
+    parser.add_argument("--iter-threshold", type=int, default=0,
+                        help="allowed increase in SP iterations")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="take the best time of this many runs")
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(),
+                       "solver": settings["default_solver"],
+                       "results": results}, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold,
+                              args.iter_threshold)
+        for r in regressions:
+            print("REGRESSION " + r)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
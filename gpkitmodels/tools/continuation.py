@@ -0,0 +1,116 @@
+" coarse-to-fine continuation over an SP model's discretization "
+from __future__ import print_function
+import time
+import tracemalloc
+import numpy as np
+
+def _name(vk):
+    "variable name and model lineage, the same for every discretization"
+    return (vk.name, tuple(name for name, _ in vk.lineage or ()))
+
+def _distributions(sol):
+    "{name: array} of a solution's free variables, vectors reassembled"
+    out = {}
+    for vk, value in sol["freevariables"].items():
+        value = getattr(value, "magnitude", value)
+        if vk.shape and vk.idx is None:
+            out[_name(vk)] = np.array(value, float)
+        elif vk.idx is None or not vk.shape:
+            out[_name(vk)] = float(value)
+        else:
+            out.setdefault(_name(vk), np.full(vk.shape, np.nan))[vk.idx] = value
+    return out
+
+def interpolate_x0(sol, coarse_eta, model, fine_eta):
+    """starting point for model from a solution at a coarser discretization
+
+    Vectors with one value per node or per element of the coarse node grid
+    coarse_eta are interpolated in log space onto the nodes or element
+    midpoints of fine_eta; scalars are copied and anything else is left
+    out.
+    """
+    coarse = _distributions(sol)
+    coarse_eta = np.asarray(coarse_eta, float)
+    fine_eta = np.asarray(fine_eta, float)
+    stations = {len(coarse_eta): (coarse_eta, fine_eta),
+                len(coarse_eta) - 1: ((coarse_eta[1:] + coarse_eta[:-1])/2.,
+                                      (fine_eta[1:] + fine_eta[:-1])/2.)}
+    x0 = {}
+    for vk in model.varkeys:
+        if vk in model.substitutions or _name(vk) not in coarse:
+            continue
+        value = coarse[_name(vk)]
+        if not np.ndim(value):
+            if vk.idx is None:
+                x0[vk] = value
+        elif (vk.idx is not None and len(vk.idx) == 1
+              and len(value) in stations and not np.isnan(value).any()):
+            xs, fx = stations[len(value)]
+            if len(fx) == vk.shape[0]:
+                x0[vk] = np.exp(np.interp(fx[vk.idx[0]], xs, np.log(value)))
+    return x0
+
+def continuation_solve(builder, Ns, memory=False, verbosity=0, **kwargs):
+    """localsolves an SP model at a sequence of increasingly fine
+    discretizations, each level started from the last level's solution
+
+    Only for SP models, such as a BladeElementProp: a GP is convex and its
+    interior point solvers take no starting point, so a GP such as a Wing
+    or Beam gains nothing from coarser levels and should be solved at the
+    finest N directly.
+
+    Arguments
+    ---------
+    builder: function
+        builder(N) returns (model, eta): the SP to solve at N stations
+        with its cost set, and its node positions (array, Variable with
+        substituted values, or None for uniform spacing); N per-element
+        values go with N + 1 nodes
+    Ns: list of ints
+        discretizations, coarsest first
+    memory: bool
+        if True, also report each level's peak memory traced by
+        tracemalloc; a tracer started here is stopped at the end, and one
+        the caller started is left running, its traces kept, so the peak
+        reported is then that since the caller started tracing
+    kwargs:
+        passed to localsolve
+
+    Returns
+    -------
+    solution at the finest N, and a list with the N, wall time [s],
+    number of GP solves and, if memory, peak traced memory [MB] of each
+    level
+    """
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    sol, eta_c, report = None, None, []
+    try:
+        for N in Ns:
+            if started:
+                tracemalloc.clear_traces()  # resets the peak
+            start = time.time()
+            model, eta = builder(N)
+            if eta is None:
+                eta = np.linspace(0, 1, N)
+            elif hasattr(eta, "key"):
+                eta = getattr(model.substitutions[eta], "magnitude",
+                              model.substitutions[eta])
+            x0 = {} if sol is None else interpolate_x0(sol, eta_c, model, eta)
+            sol = model.localsolve(verbosity=verbosity, x0=x0 or None,
+                                   **kwargs)
+            eta_c = eta
+            report.append({"N": N, "time": time.time() - start,
+                           "solves": len(model.program.gps)})
+            if memory:
+                report[-1]["memory"] = tracemalloc.get_traced_memory()[1]/1e6
+            if verbosity > 0:
+                print("N=%d: %.3f s, %d solve(s)"
+                      % (N, report[-1]["time"], report[-1]["solves"])
+                      + (", %.1f MB peak" % report[-1]["memory"]
+                         if memory else ""))
+    finally:
+        if started:
+            tracemalloc.stop()
+    return sol, report
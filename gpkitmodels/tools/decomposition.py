@@ -0,0 +1,170 @@
+" consensus decomposition of models that share a design "
+from __future__ import print_function
+from builtins import range
+import multiprocessing
+import pickle
+import numpy as np
+from gpkit import Model, Variable
+from gpkitmodels.tools.helpers import shared_name
+
+class ConsensusSubproblem(Model):
+    """a model plus a penalty pulling its copy of shared variables to zhat
+
+    Arguments
+    ---------
+    model: Model
+        subproblem with its cost set
+    shared: Model
+        submodel of model whose free variables are shared with the other
+        subproblems
+
+    The cost is model.cost + rho/2*sum(x/zhat + zhat/x) over the shared
+    free variables x, a posynomial stand-in for a quadratic penalty on
+    log(x/zhat). rho and zhat are substitutable so one subproblem can be
+    resolved at every consensus iteration.
+    """
+    def setup(self, model, shared):
+        self.keys = sorted((vk for vk in shared.varkeys
+                            if vk not in model.substitutions),
+                           key=shared_name)
+        self.names = [shared_name(vk) for vk in self.keys]
+        self.rho = Variable("\\rho_{consensus}", 1e-8, "-",
+                            "consensus penalty weight")
+        self.zhat = [Variable("\\hat{z}_{%d}" % i, 1., "-",
+                              "consensus target for %s" % vk)
+                     for i, vk in enumerate(self.keys)]
+        penalty = 0
+        for vk, zhat in zip(self.keys, self.zhat):
+            x = Variable(vk)/vk.units if vk.units else Variable(vk)
+            penalty += x/zhat + zhat/x
+        costunits = model.cost.units if model.cost.units else 1
+        self.cost = model.cost + self.rho/2*penalty*costunits
+        self.original = model
+        return [model]
+
+_SUBPROBLEMS = {}
+
+def _consensus_job(job):
+    """solves one subproblem, building it on first use in this process
+
+    The subproblem and its last solution, the next warm start, stay in
+    the process, so each subproblem must always be sent to the same one.
+    Returns (original cost, shared variable values, shared names), or
+    None if the solve failed.
+    """
+    builder, rho, zhat, kwargs = job
+    key = pickle.dumps(builder)
+    if key not in _SUBPROBLEMS:
+        _SUBPROBLEMS[key] = [ConsensusSubproblem(*builder()), None]
+    sub, x0 = _SUBPROBLEMS[key]
+    sub.substitutions[sub.rho] = rho
+    if zhat is not None:
+        sub.substitutions.update(dict(zip(sub.zhat, zhat)))
+    try:
+        sol = sub.localsolve(x0=x0, **kwargs)
+    except (RuntimeWarning, ValueError):
+        return None
+    _SUBPROBLEMS[key][1] = sol["freevariables"]
+    cost = sol(sub.original.cost)
+    x = [sol(vk) for vk in sub.keys]
+    x = [float(getattr(v, "magnitude", v)) for v in x]
+    return float(getattr(cost, "magnitude", cost)), x, sub.names
+
+def consensus_solve(builders, rho=1., tol=1e-3, max_iter=100, workers=None,
+                    verbosity=0, **kwargs):
+    """solves subproblems that share a design in parallel until they agree
+
+    Arguments
+    ---------
+    builders: list of picklable callables
+        each returns (model, shared) as taken by ConsensusSubproblem, e.g.
+        functools.partial of a module-level function
+    rho: float
+        penalty weight, relative to the mean subproblem cost
+    tol: float
+        largest allowed relative disagreement between subproblem copies of
+        the shared variables and their consensus value
+    workers: int
+        number of worker processes, each keeping the subproblems pinned to
+        it between iterations; defaults to the number of cpus, 1 solves the
+        subproblems serially in this process
+    verbosity: int
+        if above 0, prints the residuals at every iteration
+    kwargs:
+        passed to each subproblem's localsolve
+
+    The subproblems are first solved independently, then re-solved with
+    a penalty towards the consensus design z, which is updated to the
+    geometric centre of their shared variables, in the manner of ADMM in
+    log space: the scaled multipliers u accumulate each subproblem's
+    disagreement log(x/z) and shift its target to z*exp(-u). At
+    convergence the shared variables agree and the sum of the subproblem
+    costs is stationary, as for the monolithic model.
+
+    Returns
+    -------
+    dict with the consensus design "z" ({shared name: value}), the
+    subproblem "costs", the number of "iterations", the final "primal"
+    and "dual" residuals and whether both fell below tol, "converged";
+    reaching max_iter returns the last iterate with "converged" False
+    """
+    kwargs.setdefault("verbosity", 0)
+    n = len(builders)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    # one single-process pool per worker, so that subproblem i is always
+    # solved where its model and warm start were kept
+    pools = ([multiprocessing.Pool(1) for _ in range(min(workers, n))]
+             if workers > 1 else [])
+
+    def solve(rhoval, zhats):
+        jobs = [(b, rhoval, zh, kwargs) for b, zh in zip(builders, zhats)]
+        if pools:
+            res = [pools[i % len(pools)].apply_async(_consensus_job, (job,))
+                   for i, job in enumerate(jobs)]
+            res = [r.get() for r in res]
+        else:
+            res = [_consensus_job(job) for job in jobs]
+        if any(r is None for r in res):
+            raise RuntimeWarning("consensus subproblems %s failed to solve"
+                                 % [i for i, r in enumerate(res) if r is None])
+        if any(r[2] != res[0][2] for r in res):
+            raise ValueError("subproblems do not share the same variables")
+        costs = np.array([r[0] for r in res])
+        return costs, np.log([r[1] for r in res]), res[0][2]
+
+    try:
+        costs, logx, names = solve(1e-8, [None]*n)
+        logz = logx.mean(axis=0)
+        u = np.zeros_like(logx)
+        rhoval = rho*np.abs(costs).mean()
+        converged = False
+        for it in range(1, max_iter + 1):
+            costs, logx, _ = solve(rhoval, np.exp(logz - u))
+            w = logx + u
+            logznew = 0.5*(np.log(np.exp(w).sum(axis=0))
+                           - np.log(np.exp(-w).sum(axis=0)))
+            u += logx - logznew
+            primal = np.abs(logx - logznew).max()
+            dual = np.abs(logznew - logz).max()
+            logz = logznew
+            if verbosity > 0:
+                print("consensus iteration %d: primal %.2e, dual %.2e, "
+                      "cost %.6g" % (it, primal, dual, costs.sum()))
+            converged = primal < tol and dual < tol
+            if converged:
+                break
+            if primal > 10*dual:
+                lam = rhoval*np.sinh(u)
+                rhoval *= 2
+                u = np.arcsinh(lam/rhoval)
+    finally:
+        for pool in pools:
+            pool.close()
+            pool.join()
+        _SUBPROBLEMS.clear()
+    if verbosity > 0 and not converged:
+        print("consensus did not converge in %d iterations" % max_iter)
+    return {"z": dict(zip(names, np.exp(logz))), "costs": costs,
+            "iterations": it, "converged": converged, "primal": primal,
+            "dual": dual}
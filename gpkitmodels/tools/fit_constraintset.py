@@ -2,11 +2,16 @@ from __future__ import print_function
 from builtins import str
 from builtins import zip
 from builtins import range
+import atexit
 import numpy as np
 from gpkit import ConstraintSet
 from gpkit import Variable, NomialArray
 from gpkit.small_scripts import unitstr
-from .xfoilWrapper import blind_call, single_cl
+from .xfoilWrapper import blind_call, single_cl, XfoilSessionPool
+
+# xfoil sessions reused across solves by FitCS verification
+XFOIL_SESSIONS = XfoilSessionPool()
+atexit.register(XFOIL_SESSIONS.close)
 
 class FitCS(ConstraintSet):
     def __init__(self, df, ivar, dvars, nobounds=False, err_margin=False, airfoil=False):
@@ -130,7 +135,8 @@ class FitCS(ConstraintSet):
                 cdgp = result(ivr)
                 failmsg = "Xfoil call failed at CL=%.4f and Re=%.1f" % (cl, re)
                 try:
-                    x = blind_call(topline, cl, re, 0.0)
+                    x = blind_call(topline, cl, re, 0.0,
+                                   sessions=XFOIL_SESSIONS)
                     if "VISCAL:  Convergence failed" in x:
                         print("Convergence Warning: %s" % failmsg)
                         cd, cl = cdgp, 1.0
@@ -0,0 +1,141 @@
+" reading and evaluating gpfit fit data without building a GP "
+from __future__ import division
+from builtins import range
+from builtins import object
+import csv
+import os
+import threading
+import numpy as np
+
+def _number(value):
+    "parses a csv field the way pandas would for a single row"
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+def read_fitdata(path):
+    "returns the first row of a fit csv as a dict of numbers and strings"
+    with open(path) as f:
+        row = next(csv.DictReader(f))
+    return dict((k, _number(v)) for k, v in row.items())
+
+_FITDATA = {}
+_FITDATA_LOCK = threading.Lock()
+
+def load_fitdata(path):
+    """fit data for a csv, parsed once per process
+
+    Returns the same dict FitCS and XfoilFit would get from
+    pd.read_csv(path).to_dict(orient="records")[0]. Records are cached by
+    absolute path and reparsed only if the file changes on disk; each call
+    returns a copy, so callers may modify or pickle it.
+    """
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    with _FITDATA_LOCK:
+        cached = _FITDATA.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _FITDATA[path] = (mtime, read_fitdata(path))
+    return dict(cached[1])
+
+class FitEvaluator(object):
+    """vectorized numpy evaluation of a MA, SMA or ISMA fit
+
+    Takes the same fit data FitCS and XfoilFit take: a dict (or
+    DataFrame, or path to the csv) with K, d, ftype, the exponents eXY,
+    coefficients cX and, for softmax fits, aX. Both the 0-indexed columns
+    written by gpfit (e00, c0, lb0) and the 1-indexed ones read by
+    gpkitmodels.tools.FitCS (e11, c1, lb1) are understood.
+
+    Example
+    -------
+    >>> cdp = FitEvaluator(path + "jho_fitdata.csv")
+    >>> cd, err = cdp.evaluate(cl, re)  # cl, re arrays of any shape
+
+    """
+    chunksize = 500000
+
+    def __init__(self, fitdata):
+        if isinstance(fitdata, str):
+            fitdata = load_fitdata(fitdata)
+        elif hasattr(fitdata, "to_dict") and hasattr(fitdata, "iloc"):
+            fitdata = fitdata.to_dict(orient="records")[0]
+        fd = dict(fitdata)
+
+        self.K = K = int(fd["K"])
+        self.d = d = int(fd["d"])
+        self.ftype = fd["ftype"]
+        o = 0 if "c0" in fd else 1
+        self.A = np.array([[float(fd["e%d%d" % (k+o, i+o)]) for i in range(d)]
+                           for k in range(K)])
+        self.logB = np.log([float(fd["c%d" % (k+o)]) for k in range(K)])
+        if self.ftype == "ISMA":
+            ao = 1 if "a%d" % K in fd else 0
+            self.alpha = np.array([float(fd["a%d" % (k+ao)])
+                                   for k in range(K)])
+        elif self.ftype == "SMA":
+            self.alpha = float(fd["a1"])
+        elif self.ftype != "MA":
+            raise ValueError("unknown fit type '%s'" % self.ftype)
+        self.bounds = np.array([[float(fd["lb%d" % (i+o)]),
+                                 float(fd["ub%d" % (i+o)])] for i in range(d)
+                                if "lb%d" % (i+o) in fd])
+        self.errors = {"RMS": float(fd.get("rms_err", np.nan)),
+                       "Max": float(fd.get("max_err", np.nan))}
+
+    def _logw(self, logu):
+        "log of the fit output for an array of log inputs of shape (d, n)"
+        z = self.logB[:, np.newaxis] + self.A.dot(logu)
+        if self.ftype == "MA":
+            return z.max(axis=0)
+        if self.ftype == "SMA":
+            zmax = z.max(axis=0)
+            return (zmax + np.log(np.exp(z - zmax).sum(axis=0)))/self.alpha
+        # ISMA: solve sum(exp(z_k - alpha_k*y)) = 1 for y = log(w) by Newton's
+        # method; starting at the max-affine value, where the residual is
+        # positive, the iterates increase monotonically onto the root
+        alpha = self.alpha[:, np.newaxis]
+        y = (z/alpha).max(axis=0)
+        for _ in range(100):
+            t = z - alpha*y
+            tmax = t.max(axis=0)
+            p = np.exp(t - tmax)
+            f = tmax + np.log(p.sum(axis=0))
+            dy = f/((p*alpha).sum(axis=0)/p.sum(axis=0))
+            y += dy
+            if np.all(np.abs(dy) < 1e-12):
+                break
+        return y
+
+    def __call__(self, *u):
+        "fit output w for inputs u_1...u_d (arrays broadcast together)"
+        if len(u) != self.d:
+            raise ValueError("fit takes %d inputs, %d given" % (self.d, len(u)))
+        u = np.broadcast_arrays(*[np.asarray(ui, dtype=float) for ui in u])
+        shape = u[0].shape
+        logu = np.log(np.array([ui.ravel() for ui in u]).reshape(self.d, -1))
+        logw = np.empty(logu.shape[1])
+        for i in range(0, logu.shape[1], self.chunksize):
+            logw[i:i+self.chunksize] = self._logw(logu[:, i:i+self.chunksize])
+        return np.exp(logw).reshape(shape)
+
+    def evaluate(self, *u, **kwargs):
+        """fit output and its error bar, err_margin="RMS" (default) or "Max"
+
+        The error bar is the fit's relative RMS or max error scaled by the
+        output, matching the m_{fac-fit} margin FitCS applies.
+        """
+        w = self(*u)
+        return w, w*self.errors[kwargs.get("err_margin", "RMS")]
+
+    def in_bounds(self, *u):
+        "True where every input lies within the range of the fitted data"
+        u = np.broadcast_arrays(*[np.asarray(ui, dtype=float) for ui in u])
+        ok = np.ones(u[0].shape, dtype=bool)
+        for ui, (lb, ub) in zip(u, self.bounds):
+            ok &= (ui >= lb) & (ui <= ub)
+        return ok
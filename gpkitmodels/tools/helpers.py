@@ -0,0 +1,11 @@
+" small helpers shared by the solve tools and models "
+import numpy as np
+
+def magnitude(value):
+    "strips units from a number, array or pint quantity"
+    return np.asarray(getattr(value, "magnitude", value), dtype=float)
+
+def shared_name(vk):
+    "name of a variable that is the same in every process and model copy"
+    return (vk.name, tuple(name for name, _ in vk.lineage or ()),
+            vk.idx or ())
@@ -0,0 +1,261 @@
+" Monte Carlo propagation of the uncertainty in pr= annotated constants "
+from __future__ import print_function
+from builtins import range
+import glob
+import multiprocessing
+import os
+import pickle
+import numpy as np
+from gpkitmodels.tools.batch import batch_localsolve
+from gpkitmodels.tools.helpers import magnitude, shared_name
+
+CHUNK_SIZE = 1000
+RESERVED = ("samples", "names", "cost", "converged", "run")
+
+def uncertain_constants(model):
+    """substituted constants of model that carry a pr= uncertainty
+
+    Returns (keys, nominal values, pr percentages), one scalar key per
+    element of vector constants, sorted by name. Sweeps and linked
+    (function) values are left out.
+    """
+    found = []
+    for vk, value in model.substitutions.items():
+        pr = vk.descr.get("pr")
+        value = np.asarray(value)
+        if not pr or vk.idx or value.dtype == object:
+            continue
+        if vk.shape:
+            for ek in model.varkeys[vk]:
+                if ek.idx:
+                    found.append((ek, float(value[ek.idx]), float(pr)))
+        else:
+            found.append((vk, float(value), float(pr)))
+    found.sort(key=lambda f: shared_name(f[0]))
+    return [f[0] for f in found], [f[1] for f in found], [f[2] for f in found]
+
+def sample(nominal, pr, n, rng, distribution="uniform"):
+    """(n, len(nominal)) array of samples of constants with pr percent
+    uncertainty
+
+    "uniform" samples within +/- pr percent of the nominal value; with
+    "normal", pr percent is three standard deviations, and samples are
+    kept positive.
+    """
+    nominal, rel = np.asarray(nominal, float), np.asarray(pr, float)/100.
+    shape = (n, len(nominal))
+    if distribution == "uniform":
+        factor = 1 + rel*rng.uniform(-1, 1, shape)
+    elif distribution == "normal":
+        factor = np.maximum(1 + rel*rng.standard_normal(shape)/3., 1e-3)
+    else:
+        raise ValueError("unknown distribution %r" % distribution)
+    return nominal*factor
+
+def _solve_rows(model, columns, outputs, **kwargs):
+    """solves a GP once per row of columns, as batch_localsolve does an SP;
+    the model's own substitutions are restored afterwards"""
+    n = len(list(columns.values())[0])
+    result = {"cost": np.full(n, np.nan),
+              "converged": np.zeros(n, dtype=bool)}
+    original = dict((k, model.substitutions[k]) for k in columns
+                    if k in model.substitutions)
+    try:
+        for i in range(n):
+            model.substitutions.update(dict((k, c[i])
+                                            for k, c in columns.items()))
+            try:
+                sol = model.solve(**kwargs)
+            except (RuntimeWarning, ValueError):
+                continue
+            result["converged"][i] = True
+            result["cost"][i] = magnitude(sol["cost"])
+            for out in outputs:
+                value = magnitude(sol(out))
+                if out not in result:
+                    result[out] = np.full((n,) + value.shape, np.nan)
+                result[out][i] = value
+    finally:
+        for k in columns:
+            if k in original:
+                model.substitutions[k] = original[k]
+            else:
+                del model.substitutions[k]
+    return result
+
+def _run(n, seed, chunk_size, outputs, localsolve, distribution):
+    """string identifying the parameters of a run, stored in each of its
+    chunks; callable outputs are identified by their names"""
+    outputs = sorted((label, out if isinstance(out, str)
+                      else getattr(out, "__name__", repr(out)))
+                     for label, out in outputs.items())
+    return repr((n, seed, chunk_size, outputs, bool(localsolve),
+                 distribution))
+
+_MODELS = {}
+
+def _chunk_job(job):
+    """samples and solves one chunk, building the model on first use in
+    this process; writes the chunk to path and returns its number of
+    converged samples
+
+    A chunk already at path is kept if it was written by the same run,
+    and raises ValueError otherwise.
+    """
+    (builder, seed, n, outputs, path, localsolve, distribution, run,
+     kwargs) = job
+    if os.path.exists(path):
+        with np.load(path) as data:
+            if "run" not in data.files or str(data["run"]) != run:
+                raise ValueError("%s was written by a different run; use a"
+                                 " new directory" % path)
+            return int(data["converged"].sum())
+    key = pickle.dumps(builder)
+    if key not in _MODELS:
+        model = builder()
+        _MODELS[key] = model, uncertain_constants(model)
+    model, (keys, nominal, pr) = _MODELS[key]
+    if not keys:
+        raise ValueError("the model has no pr= annotated constants")
+    samples = sample(nominal, pr, n, np.random.default_rng(seed),
+                     distribution)
+    columns = dict(zip(keys, samples.T))
+    exprs = dict((label, out(model) if callable(out) else model[out])
+                 for label, out in outputs.items())
+    kwargs = dict(kwargs, verbosity=0)
+    if localsolve:
+        res = batch_localsolve(model, columns, list(exprs.values()),
+                               **kwargs)
+    else:
+        res = _solve_rows(model, columns, list(exprs.values()), **kwargs)
+    data = {"samples": samples, "names": np.array([str(k) for k in keys]),
+            "cost": res["cost"], "converged": res["converged"],
+            "run": np.array(run)}
+    for label, expr in exprs.items():
+        data[label] = res.get(expr, np.full(n, np.nan))
+    tmp = path + ".part"
+    with open(tmp, "wb") as f:
+        np.savez(f, **data)
+    os.rename(tmp, path)
+    return int(res["converged"].sum())
+
+def summarize(directory, quantiles=(0.05, 0.5, 0.95), paths=None):
+    """quantiles of the cost and outputs of the converged samples of one
+    run's chunk files
+
+    The quantiles are exact, not merged from each chunk's: one label at a
+    time, the converged values of that label in every chunk are read into
+    memory together, i.e. up to n floats per element of the output.
+
+    Arguments
+    ---------
+    directory: str
+        holding the chunks; all of its chunk*.npz files are read unless
+        paths are given, and must then come from a single run
+    paths: list of str
+        the chunk files of the run to summarize, as monte_carlo passes
+
+    Returns
+    -------
+    dict with the number of samples "n", the number "converged", and
+    {label: array of quantiles (along its first axis)} "quantiles"
+    """
+    if paths is None:
+        paths = sorted(glob.glob(os.path.join(directory, "chunk*.npz")))
+    if not paths:
+        raise ValueError("no Monte Carlo chunks in %s" % directory)
+    runs, converged = set(), []
+    for path in paths:
+        with np.load(path) as data:
+            runs.add(str(data["run"]) if "run" in data.files else None)
+            converged.append(data["converged"])
+    if len(runs) > 1:
+        raise ValueError("the chunks in %s come from more than one run"
+                         % directory)
+    with np.load(paths[0]) as data:
+        labels = [k for k in data.files
+                  if k not in ("names", "converged", "run")]
+    out = {"n": sum(len(c) for c in converged),
+           "converged": int(sum(c.sum() for c in converged)),
+           "quantiles": {}}
+    if not out["converged"]:
+        raise RuntimeWarning("no Monte Carlo sample converged")
+    for label in labels:
+        column = []
+        for path, ok in zip(paths, converged):
+            with np.load(path) as data:
+                column.append(data[label][ok])
+        out["quantiles"][label] = np.quantile(np.concatenate(column),
+                                              quantiles, axis=0)
+    return out
+
+def monte_carlo(builder, n, directory, outputs=None, seed=0,
+                chunk_size=CHUNK_SIZE, quantiles=(0.05, 0.5, 0.95),
+                localsolve=False, distribution="uniform", workers=None,
+                verbosity=0, **kwargs):
+    """propagates the pr= uncertainties of a model's constants
+
+    Arguments
+    ---------
+    builder: picklable callable
+        returns the model with its cost set; it is built once per process
+    n: int
+        number of samples
+    directory: str
+        where each chunk of samples is written as chunkNNNNN.npz with its
+        "samples" (and their "names"), "cost", "converged" flags,
+        outputs and the "run" parameters (n, seed, chunk_size, outputs,
+        localsolve and distribution); chunks already there from the same
+        run are kept, so a study can resume, and chunks from any other run
+        raise ValueError
+    outputs: dict
+        {label: variable name, or picklable function of the model
+        returning an expression} of results to store
+    seed: int
+        root of the random streams; chunk i draws from the i-th
+        SeedSequence child, so results do not depend on workers
+    localsolve: bool
+        solve each sample with localsolve, warm started (x0) from the
+        nearest converged sample as in batch_localsolve
+    distribution: str
+        "uniform" or "normal", as taken by sample
+    workers: int
+        size of the process pool; defaults to the number of cpus, 1 solves
+        the chunks serially in this process
+    kwargs:
+        passed to solve or localsolve
+
+    Returns
+    -------
+    summarize's quantiles of the converged samples
+    """
+    outputs = outputs or {}
+    if set(outputs) & set(RESERVED):
+        raise ValueError("output labels may not be any of %s"
+                         % (RESERVED,))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    nchunks = -(-n//chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(nchunks)
+    run = _run(n, seed, chunk_size, outputs, localsolve, distribution)
+    paths = [os.path.join(directory, "chunk%05d.npz" % i)
+             for i in range(nchunks)]
+    jobs = [(builder, seeds[i], min(chunk_size, n - i*chunk_size), outputs,
+             paths[i], localsolve, distribution, run, kwargs)
+            for i in range(nchunks)]
+    if workers == 1:
+        try:
+            converged = [_chunk_job(job) for job in jobs]
+        finally:
+            _MODELS.clear()
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            converged = pool.map(_chunk_job, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    if verbosity > 0:
+        print("Monte Carlo: %d of %d samples converged"
+              % (sum(converged), n))
+    return summarize(directory, quantiles, paths)
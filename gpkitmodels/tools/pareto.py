@@ -0,0 +1,268 @@
+" Pareto fronts of two objectives, solved in parallel "
+from __future__ import print_function
+from builtins import range
+import multiprocessing
+import pickle
+import numpy as np
+from gpkit import Model, Variable
+from gpkitmodels.tools.helpers import magnitude
+
+METHODS = ("epsilon", "weighted")
+# relative slack on an anchor's own objective while it minimizes the other;
+# SPs held much closer to a local minimum tend to cycle between two GPs
+ANCHOR_TOL = 1e-2
+
+def _normalized(f):
+    "objective f divided by its units"
+    return f/f.units if f.units else f
+
+class _Problem(object):
+    """a built model and its two objectives, solved for any point
+
+    Objectives are normalized by their units, so that weights and
+    epsilon bounds are plain numbers.
+    """
+    def __init__(self, build):
+        model, f1, f2 = build()
+        self.model = model
+        self.f1, self.f2 = _normalized(f1), _normalized(f2)
+        self.epsilon = Variable("\\epsilon_{pareto}", 1., "-",
+                                "upper bound on the second objective")
+        self.epsilon1 = Variable("\\epsilon_{pareto_1}", 1., "-",
+                                 "upper bound on the first objective")
+        self.free = Model(self.f1, [model])
+        self.bounded = Model(self.f1, [model, self.f2 <= self.epsilon])
+        self.bounded1 = Model(self.f2, [model, self.f1 <= self.epsilon1])
+
+    def solve(self, method, p, localsolve, x0, kwargs):
+        """solves point p: an anchor for method "f1" or "f2", f1 with
+        f2 <= p for "epsilon", or f1 + p*f2 for "weighted"; returns the
+        solution and the two objectives
+
+        An anchor minimizes its objective alone, then the other with the
+        first held within ANCHOR_TOL of that minimum: minimizing one alone
+        can leave the other anywhere it is not bound, e.g. a mission time
+        only bounded below.
+        """
+        if method == "epsilon":
+            sol = self._solve(self.bounded, None, {self.epsilon: p},
+                              localsolve, x0, kwargs)
+        elif method == "weighted":
+            sol = self._solve(self.free, self.f1 + p*self.f2, {},
+                              localsolve, x0, kwargs)
+        else:
+            f, m, bound = ((self.f1, self.bounded1, self.epsilon1)
+                           if method == "f1"
+                           else (self.f2, self.bounded, self.epsilon))
+            sol = self._solve(self.free, f, {}, localsolve, x0, kwargs)
+            fmin = float(magnitude(sol(f)))
+            sol = self._solve(m, None, {bound: fmin*(1 + ANCHOR_TOL)},
+                              localsolve, sol["freevariables"], kwargs)
+        return (sol, float(magnitude(sol(self.f1))),
+                float(magnitude(sol(self.f2))))
+
+    @staticmethod
+    def _solve(m, cost, substitutions, localsolve, x0, kwargs):
+        """solves m with cost (unless None) and substitutions; the models
+        are shared by every point solved in this process, so its own cost
+        and substitutions are restored afterwards"""
+        original = m.cost, m.substitutions.copy()
+        try:
+            if cost is not None:
+                m.cost = cost
+            m.substitutions.update(substitutions)
+            if localsolve:
+                return m.localsolve(x0=x0, **kwargs)
+            return m.solve(**kwargs)
+        finally:
+            m.cost = original[0]
+            m.substitutions.clear()
+            m.substitutions.update(original[1])
+
+_PROBLEMS = {}
+
+def _front_job(job):
+    """solves the points of one chunk in order, each warm started from the
+    last that converged; returns rows of (f1, f2, outputs) or None"""
+    build, method, params, outputs, localsolve, kwargs = job
+    key = pickle.dumps(build)
+    if key not in _PROBLEMS:
+        _PROBLEMS[key] = _Problem(build)
+    problem = _PROBLEMS[key]
+    rows, x0 = [], None
+    for p in params:
+        try:
+            sol, f1, f2 = problem.solve(method, p, localsolve, x0, kwargs)
+        except (RuntimeWarning, ValueError):
+            rows.append(None)
+            continue
+        x0 = sol["freevariables"]
+        rows.append((f1, f2, dict((label, magnitude(sol(problem.model[out])))
+                                  for label, out in outputs.items())))
+    return rows
+
+def _solve_points(pool, nchunks, build, method, params, outputs, localsolve,
+                  kwargs):
+    "rows of each of params, split into contiguous chunks"
+    chunks = [c for c in np.array_split(np.asarray(params, float),
+                                        min(nchunks, len(params))) if len(c)]
+    jobs = [(build, method, list(c), outputs, localsolve, kwargs)
+            for c in chunks]
+    return [row for rows in _map(pool, jobs) for row in rows]
+
+def _map(pool, jobs):
+    "_front_job of each of jobs, in the pool if there is one"
+    if pool:
+        return pool.map(_front_job, jobs, chunksize=1)
+    return [_front_job(job) for job in jobs]
+
+def _dominated(points):
+    """parameters of the solved points of {parameter: row} that another
+    solved point dominates: as low an f1 at as low an f2"""
+    dominated, best = [], np.inf
+    for f2, f1, p in sorted((row[1], row[0], p) for p, row in points.items()
+                            if row is not None):
+        if f1 >= best:
+            dominated.append(p)
+        else:
+            best = f1
+    return dominated
+
+def _resolve_dominated(pool, build, method, points, outputs, localsolve,
+                       kwargs):
+    """re-solves each run of consecutive dominated points from the other
+    side: down from the next higher parameter that is not dominated, each
+    warm started from the last, keeping the new rows"""
+    dominated = set(_dominated(points))
+    params = sorted(p for p, row in points.items() if row is not None)
+    jobs, run = [], []
+    for p in params[::-1]:
+        if p in dominated:
+            run.append(p)
+            continue
+        if run:
+            jobs.append((build, method, [p] + run, outputs, localsolve,
+                         kwargs))
+        run = []
+    for job, rows in zip(jobs, _map(pool, jobs)):
+        for p, row in zip(job[2][1:], rows[1:]):
+            if row is not None:
+                points[p] = row
+
+def bends(f1, f2, bend=0.2):
+    """indices i of the intervals (i, i+1) of a front, sorted by f2, next
+    to a point where it turns by more than bend radians in log space,
+    normalized by the front's extent"""
+    x, y = np.log(f2), np.log(f1)
+    x = (x - x.min())/max(np.ptp(x), 1e-12)
+    y = (y - y.min())/max(np.ptp(y), 1e-12)
+    heading = np.arctan2(np.diff(y), np.diff(x))
+    turn = np.abs(np.diff(heading))
+    turn = np.minimum(turn, 2*np.pi - turn)
+    sharp = np.nonzero(turn > bend)[0]
+    return sorted(set(sharp) | set(sharp + 1))
+
+def pareto_front(build, n=9, method="epsilon", refine=2, bend=0.2,
+                 outputs=None, localsolve=False, workers=None, verbosity=0,
+                 **kwargs):
+    """front of two objectives, minimized against each other
+
+    Arguments
+    ---------
+    build: picklable callable
+        returns (model, f1, f2): a model with no cost of its own and the
+        two objectives, e.g. fuel weight and time; it is built once per
+        process
+    n: int
+        number of points of the initial front, between the two anchors,
+        solved in the pool, that each minimize one objective and then,
+        holding it, the other
+    method: str
+        "epsilon" minimizes f1 with f2 bounded, the bounds spaced
+        geometrically between the anchors; "weighted" minimizes
+        f1 + w*f2 with weights spaced geometrically around the anchors'
+        trade-off slope, as the fixed W_{f_m} + C_m*t_m Mission cost does
+    refine: int
+        rounds of refinement, each solving a point between the parameters
+        of every interval next to a bend of the front
+    bend: float
+        turning angle [rad] of the normalized log-log front that counts
+        as a bend
+    outputs: dict
+        {label: variable name} of values to store at each point
+    localsolve: bool
+        solve with localsolve, each point warm started from its
+        neighbour
+    workers: int
+        size of the process pool, and number of contiguous chunks the
+        points are split into; defaults to the number of cpus, 1 solves
+        every point in order in this process
+    kwargs:
+        passed to solve or localsolve
+
+    Returns
+    -------
+    dict of arrays sorted by f2: "f1" and "f2" (in their units), the
+    "parameter" (bound or weight) of each point and each output label.
+    Points that failed to solve are left out, as are points that another
+    dominates (as when a warm started localsolve lands on a worse local
+    optimum) even after being re-solved from the neighbour on their other
+    side
+    """
+    if method not in METHODS:
+        raise ValueError("method must be one of %s" % (METHODS,))
+    outputs = outputs or {}
+    kwargs.setdefault("verbosity", 0)
+    nchunks = 1 if workers == 1 else (workers or multiprocessing.cpu_count())
+    pool = None if workers == 1 else multiprocessing.Pool(workers)
+    try:
+        anchors = [rows[0] for rows in _map(pool, [
+            (build, m, [None], outputs, localsolve, kwargs)
+            for m in ["f1", "f2"]])]
+        if any(a is None for a in anchors):
+            raise RuntimeWarning("an anchor of the front did not solve")
+        (f1min, f2hi, _), (f1hi, f2min, _) = anchors
+        if method == "epsilon":
+            params = np.geomspace(f2min*(1 + 1e-4), f2hi, n)
+        else:
+            slope = max(f1hi - f1min, 1e-12)/max(f2hi - f2min, 1e-12)
+            params = slope*np.geomspace(1e-2, 1e2, n)
+        points = dict(zip(params, _solve_points(
+            pool, nchunks, build, method, params, outputs, localsolve,
+            kwargs)))
+        for r in range(refine):
+            front = sorted((row[1], row[0], p) for p, row in points.items()
+                           if row is not None)
+            if len(front) < 3:
+                break
+            f2, f1, p = [np.array(c) for c in zip(*front)]
+            new = [np.sqrt(p[i]*p[i + 1]) for i in bends(f1, f2, bend)
+                   if i + 1 < len(p)]
+            new = sorted(set(new) - set(points))
+            if verbosity > 0:
+                print("pareto refinement %d: %d new points" % (r + 1,
+                                                               len(new)))
+            if not new:
+                break
+            points.update(zip(new, _solve_points(
+                pool, nchunks, build, method, new, outputs, localsolve,
+                kwargs)))
+        _resolve_dominated(pool, build, method, points, outputs,
+                           localsolve, kwargs)
+    finally:
+        _PROBLEMS.clear()
+        if pool:
+            pool.close()
+            pool.join()
+    dominated = set(_dominated(points))
+    front = sorted((row[1], p, row) for p, row in points.items()
+                   if row is not None and p not in dominated)
+    out = {"f1": np.array([row[0] for _, _, row in front]),
+           "f2": np.array([f2 for f2, _, _ in front]),
+           "parameter": np.array([p for _, p, _ in front])}
+    for label in outputs:
+        out[label] = np.array([row[2][label] for _, _, row in front])
+    if verbosity > 0:
+        print("pareto front: %d of %d points solved, %d dominated"
+              % (len(front) + len(dominated), len(points), len(dominated)))
+    return out
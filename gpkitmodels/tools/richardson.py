@@ -0,0 +1,101 @@
+" Richardson extrapolation of discretized results to the continuum limit "
+from __future__ import print_function
+import numpy as np
+from gpkitmodels.tools.helpers import magnitude
+
+def convergence_order(h, f, default=2., bounds=(0.5, 8.)):
+    """observed order p of f = f0 + C*h**p from three grid levels
+
+    h and f are ordered coarsest first. Falls back to default when the
+    differences change sign (oscillatory or already converged results).
+    """
+    (h1, h2, h3), (f1, f2, f3) = h, f
+    if f2 == f3 or (f1 - f2)/(f2 - f3) <= 0:
+        return default
+    ratio = (f1 - f2)/(f2 - f3)
+    g = lambda p: (h1**p - h2**p)/(h2**p - h3**p) - ratio
+    lo, hi = bounds
+    if g(lo) >= 0 or g(hi) <= 0:
+        return lo if g(lo) >= 0 else hi
+    for _ in range(60):
+        mid = 0.5*(lo + hi)
+        if g(mid) > 0:
+            hi = mid
+        else:
+            lo = mid
+    return 0.5*(lo + hi)
+
+def richardson(Ns, values, order=None):
+    """extrapolates results computed with Ns stations to N -> infinity
+
+    Arguments
+    ---------
+    Ns: list of ints
+        number of stations of each grid level; element size is 1/(N-1)
+    values: list of floats
+        result at each level
+    order: float
+        convergence order; if None it is estimated from the three finest
+        levels, or taken as 2 (trapezoidal rule) with only two
+
+    Returns
+    -------
+    extrapolated value, error estimate and the order used. The error is
+    Roache's grid convergence index of the finest level, 1.25 (three
+    levels) or 3 (two) times the Richardson correction, and is a
+    conservative bound for the extrapolated value.
+    """
+    Ns, values = np.asarray(Ns, float), np.asarray(values, float)
+    if len(Ns) < 2:
+        raise ValueError("extrapolation needs at least two grid levels")
+    sort = np.argsort(Ns)
+    h, f = 1./(Ns[sort] - 1), values[sort]
+    if order is None:
+        order = convergence_order(h[-3:], f[-3:]) if len(h) > 2 else 2.
+    r = h[-2]/h[-1]
+    correction = (f[-1] - f[-2])/(r**order - 1)
+    safety = 1.25 if len(h) > 2 else 3.
+    return f[-1] + correction, safety*abs(correction), order
+
+def extrapolated_solve(builder, Ns, localsolve=False, order=None,
+                       verbosity=0, **kwargs):
+    """solves a model at several discretizations and extrapolates outputs
+
+    Arguments
+    ---------
+    builder: function
+        builder(N) returns (model, outputs): the model at N stations with
+        its cost set, and {label: variable or expression} of the results
+        to extrapolate, e.g. spar weight, tip deflection w[-1], root
+        moment M[0]
+    Ns: list of ints
+        two or three cheap grid levels, e.g. [5, 9, 17]
+    order: float
+        passed to richardson
+    kwargs:
+        passed to solve or localsolve
+
+    Returns
+    -------
+    {label: {"value", "error", "order", "levels"}} for each output and the
+    "cost", where "levels" holds the result at each N
+    """
+    levels = {}
+    for N in Ns:
+        model, outputs = builder(N)
+        solve = model.localsolve if localsolve else model.solve
+        sol = solve(verbosity=max(verbosity - 1, 0), **kwargs)
+        results = dict((label, sol(expr)) for label, expr in outputs.items())
+        results["cost"] = sol["cost"]
+        for label, value in results.items():
+            levels.setdefault(label, []).append(float(magnitude(value)))
+    out = {}
+    for label, values in levels.items():
+        value, error, p = richardson(Ns, values, order)
+        out[label] = {"value": value, "error": error, "order": p,
+                      "levels": values}
+        if verbosity > 0:
+            print("%s: %.6g +/- %.2g (order %.2f, levels %s)"
+                  % (label, value, error, p,
+                     ", ".join("%.6g" % v for v in values)))
+    return out
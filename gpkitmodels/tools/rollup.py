@@ -0,0 +1,111 @@
+" indexed roll-up of weights, CG and inertia over model hierarchies "
+from functools import reduce
+from operator import add
+from gpkit import ConstraintSet, Model, Variable
+
+class RollupIndex(object):
+    """one-pass index of a summable quantity (e.g. "W") over model trees
+
+    Each model is visited once, when first added: its own variables (those
+    created in its setup) are indexed by name, and its direct child models
+    and the variables SummingConstraintSets inside it already sum are
+    recorded. Queries then take time linear in the number of models they
+    cover, however deep the hierarchy; share one index between the
+    roll-ups of an assembly so that no subtree is walked twice.
+    """
+    def __init__(self, varname="W"):
+        self.varname = varname
+        self.models = {}     # lineage: model
+        self.own = {}        # lineage: {name: own varkey}
+        self.children = {}   # lineage: [child lineages]
+        self.summed = {}     # lineage: varkeys summed at or below it
+
+    def add(self, model):
+        "indexes model and its unindexed descendants; returns its lineage"
+        if model.lineage in self.models:
+            return model.lineage
+        self.models[model.lineage] = model
+        self.own[model.lineage] = dict(
+            (vk.name, vk) for vk in model.unique_varkeys
+            if vk.lineage == model.lineage and not vk.idx)
+        children, summed = [], set()
+        stack = list(model)
+        while stack:
+            c = stack.pop()
+            if isinstance(c, Model):
+                children.append(self.add(c))
+                summed.update(self.summed[c.lineage])
+            elif isinstance(c, ConstraintSet):
+                if hasattr(c, "summedvars"):
+                    summed.update(c.summedvars)
+                if not hasattr(c, "oper"):  # skip ArrayConstraints
+                    stack.extend(c)
+        self.children[model.lineage] = children[::-1]
+        self.summed[model.lineage] = summed
+        return model.lineage
+
+    def var(self, model, name=None):
+        "model's own varkey called name (default varname), or None"
+        lineage = self.add(model)
+        return self.own[lineage].get(name or self.varname)
+
+    def summands(self, models):
+        """varkeys of varname summed over models, each model contributing
+        its own variable or, if it has none, those of its children at any
+        depth
+
+        Raises ValueError if any variable would be counted twice, e.g. a
+        model listed directly and again under a listed parent.
+        """
+        keys, seen = [], set()
+        stack = [self.add(m) for m in models][::-1]
+        while stack:
+            lineage = stack.pop()
+            vk = self.own[lineage].get(self.varname)
+            if vk is None:
+                stack.extend(self.children[lineage][::-1])
+                continue
+            if vk in seen:
+                raise ValueError("%s is double counted" % vk)
+            seen.add(vk)
+            keys.append(vk)
+        lineages = set(vk.lineage for vk in keys)
+        for vk in keys:
+            for i in range(1, len(vk.lineage)):
+                if vk.lineage[:i] in lineages:
+                    raise ValueError("%s is double counted: it is within a"
+                                     " summed model" % vk)
+        return keys
+
+    def already_summed(self, models):
+        "varkeys already summed inside models by SummingConstraintSets"
+        summed = set()
+        for m in models:
+            summed.update(self.summed[self.add(m)])
+        return summed
+
+    def moment(self, keys, arm, power=1):
+        """posynomial of each summand times its model's arm variable to a
+        power, e.g. sum(W*x) for a CG or sum(W*x**2) for an inertia;
+        summands whose model has no arm variable are left out"""
+        terms = []
+        for vk in keys:
+            x = self.own[vk.lineage].get(arm)
+            if x is not None:
+                terms.append(Variable(vk)*Variable(x)**power)
+        return sum(terms)
+
+    def evaluate(self, sol, models, arm=None):
+        """solved roll-up of models: the total "W" and, given the name of
+        an arm variable, the "cg" along it and the point-mass "inertia"
+        about that cg of the summands that have one"""
+        keys = self.summands(models)
+        out = {"W": reduce(add, [sol(vk) for vk in keys])}
+        if arm:
+            pairs = [(sol(vk), sol(self.own[vk.lineage][arm])) for vk in keys
+                     if arm in self.own[vk.lineage]]
+            W = reduce(add, [w for w, _ in pairs])
+            out["cg"] = reduce(add, [w*x for w, x in pairs])/W
+            out["inertia"] = (reduce(add, [w*x**2 for w, x in pairs])
+                              - W*out["cg"]**2)
+        return out
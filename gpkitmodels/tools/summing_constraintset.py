@@ -1,48 +1,47 @@
 " helpers.py "
-from builtins import zip
-import numpy as np
 from gpkit import ConstraintSet, Variable
+from .rollup import RollupIndex
 
-def summing_vars(models, varname):
+def summing_vars(models, varname, index=None):
     "returns a list of variables with shared varname in model list"
-    modelnames = set(m.lineage for m in models)
-    vkeys = []
+    index = index or RollupIndex(varname)
+    vrs = []
     for m in models:
-        for v in m.varkeys[varname]:
-            if v.lineage in modelnames:
-                vkeys.append(v)
-    vrs = [m[v] for m, v in zip(models, vkeys)]
+        vk = index.var(m, varname)
+        if vk is not None:
+            vrs.append(m[vk])
     return vrs
 
 class SummingConstraintSet(ConstraintSet):
-    def __init__(self, lhs, varname, models=[], variables=[], **kwargs):
-        summedvars = set([v.key for v in variables])
-        alreadysummed = set()
-        for model in models:
-            twovars = 0
-            for var in model.varkeys:
-                if var.name == varname:
-                    twovars += 1
-            if twovars > 1:
-                for dvar in model.variables_byname(varname):
-                    if model.lineage == dvar.lineage:
-                        mvars = dvar
-            else:
-                mvars = model[varname]
-            if not hasattr(mvars, "__len__"):
-                mvars = [mvars]
-            # next line makes the recursion stop at depth one
-            # for safety to avoid double counting
-            mvars = [v for v in mvars if v.key.lineage == model.lineage]
-            assert len(mvars) == 1
-            summedvars = summedvars.union([v.key for v in mvars])
-            for constraint in model.flat():
-                if hasattr(constraint, "summedvars"):
-                    alreadysummed = alreadysummed.union(constraint.summedvars)
-        summedvars = summedvars.difference(alreadysummed)
-        ConstraintSet.__init__(self, [lhs >= sum(Variable(**vk.descr)
+    """lhs >= the sum of varname over models, plus variables
+
+    Each model contributes its own varname variable; by default the
+    recursion stops at depth one, for safety against double counting, and
+    a model without one fails an assertion. With descend=True such a model
+    contributes those of its descendants at any depth instead, and any
+    variable that would be counted twice raises a ValueError. Variables a
+    SummingConstraintSet inside a model already sums are left out. Share
+    a RollupIndex of varname between the sets of an assembly so each
+    model is indexed once.
+    """
+    def __init__(self, lhs, varname, models=[], variables=[], index=None,
+                 descend=False, **kwargs):
+        if index is None or index.varname != varname:
+            index = RollupIndex(varname)
+        if descend:
+            mvars = index.summands(models)
+        else:
+            mvars = [index.var(m) for m in models]
+            assert None not in mvars, ("every model needs its own %s"
+                                       % varname)
+        summedvars = set([v.key for v in variables]).union(mvars)
+        summedvars = summedvars.difference(index.already_summed(models))
+        # kept, not read back from the constraint: posynomial inequalities
+        # do not carry their sides the same way in every gpkit version
+        self._summedvars = frozenset(summedvars)
+        ConstraintSet.__init__(self, [lhs >= sum(Variable(vk)
                                                  for vk in summedvars)],
                                **kwargs)
     @property
     def summedvars(self):
-        return set(self[0].p_lt.varkeys)
+        return set(self._summedvars)
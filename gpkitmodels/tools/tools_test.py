@@ -0,0 +1,376 @@
+" tools tests "
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from gpkitmodels.tools.xfoilWrapper import (polar_sweep, blind_call,
+                                            XfoilSessionPool)
+from gpkitmodels.tools.xfoil_cache import XfoilCache
+from gpkitmodels.tools.fitdata import FitEvaluator, load_fitdata
+from gpkitmodels.tools.spacing import node_spacing, adaptive_spacing
+from gpkitmodels.tools.richardson import richardson
+from gpkitmodels.tools.assembly import build_concurrently
+
+XFOIL_STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "xfoil_stub.py")
+
+def xfoil_sweep_test():
+    " parallel polar sweep against the stub xfoil, with a hung point "
+    os.environ["XFOIL_STUB_HANG"] = "5.0"
+    try:
+        cd, cl, cm = polar_sweep(["naca0012", "naca2412"], [2e5, 5e5],
+                                 [0., 5., 10., 20.], workers=2, timeout=2.,
+                                 pathname=XFOIL_STUB, cache=False)
+    finally:
+        del os.environ["XFOIL_STUB_HANG"]
+    assert cd.shape == (2, 2, 4)
+    assert np.isnan(cl[..., 1]).all()  # hung, killed after the timeout
+    assert np.isnan(cl[..., 3]).all()  # failed to converge
+    assert (cl[..., 2] > cl[..., 0]).all()
+    assert (cd[:, 1, [0, 2]] < cd[:, 0, [0, 2]]).all()
+
+    cd, cl, cm, _ = blind_call("naca0012 \n", 0.5, 2e5, 0.0,
+                               pathname=XFOIL_STUB, cache=False)
+    assert abs(cl - 0.5) < 1e-3
+
+def xfoil_session_test():
+    " persistent xfoil sessions give blind_call results from one process "
+    with XfoilSessionPool(max_sessions=1) as sessions:
+        for cl, re in [(0.3, 2e5), (0.5, 2e5), (0.5, 4e5)]:
+            x = blind_call("naca0012 \n", cl, re, 0.0, pathname=XFOIL_STUB,
+                           sessions=sessions, cache=False)
+            y = blind_call("naca0012 \n", cl, re, 0.0, pathname=XFOIL_STUB,
+                           cache=False)
+            assert np.allclose(x[:3], y[:3])
+        assert len(sessions.sessions) == 1
+        pid = list(sessions.sessions.values())[0].proc.pid
+        x = sessions.alpha_call("naca0012 \n", 20., 2e5, 0.0,
+                                pathname=XFOIL_STUB)
+        assert "Convergence failed" in x
+        x = sessions.call("naca0012 \n", 0.5, 2e5, 0.0, pathname=XFOIL_STUB)
+        assert abs(x[1] - 0.5) < 1e-3
+        assert list(sessions.sessions.values())[0].proc.pid == pid
+        sessions.call("naca2412 \n", 0.5, 2e5, 0.0, pathname=XFOIL_STUB)
+        assert list(sessions.sessions.values())[0].proc.pid != pid
+
+    cd, cl, cm = polar_sweep("naca0012", 2e5, [0., 5.], workers=1,
+                             pathname=XFOIL_STUB, cache=False)
+    assert np.allclose(cl, polar_sweep("naca0012", 2e5, [0., 5.], workers=1,
+                                       pathname=XFOIL_STUB, persistent=False,
+                                       cache=False)[1])
+
+def xfoil_cache_test():
+    " repeated points come from the cache, keyed by airfoil geometry "
+    tmpdir = tempfile.mkdtemp()
+    try:
+        cache = XfoilCache(os.path.join(tmpdir, "cache.sqlite"),
+                           max_entries=3)
+        datfile = os.path.join(tmpdir, "foil.dat")
+        with open(datfile, "w") as f:
+            f.write("foil\n1.0 0.0\n0.0 0.0\n1.0 0.0\n")
+        topline = "load %s \n afl \n" % datfile
+        x = blind_call(topline, 0.5, 2e5, 0.0, pathname=XFOIL_STUB,
+                       cache=cache)
+        # a second process sees the same entries
+        cache2 = XfoilCache(cache.path, max_entries=3)
+        y = blind_call(topline, 0.5, 2e5 + 1, 0.0, pathname=XFOIL_STUB,
+                       cache=cache2)
+        assert x[:3] == y[:3] and y[3] == ""
+        assert "Convergence failed" in blind_call(
+            topline, 2.0, 2e5, 0.0, pathname=XFOIL_STUB, cache=cache)
+        assert cache.size() == 1  # the failure is retried, not stored
+
+        with open(datfile, "a") as f:
+            f.write("0.5 0.01\n")
+        os.utime(datfile, (0, 0))
+        cache = XfoilCache(cache.path, max_entries=3)
+        blind_call(topline, 0.5, 2e5, 0.0, pathname=XFOIL_STUB, cache=cache)
+        blind_call(topline, 0.6, 2e5, 0.0, pathname=XFOIL_STUB, cache=cache)
+        assert cache.size() == 3
+
+        cd, cl, cm = polar_sweep(datfile, 2e5, [1., 2.], workers=2,
+                                 pathname=XFOIL_STUB, cache=cache)
+        assert cache.size() == 3 and not np.isnan(cl).any()
+    finally:
+        shutil.rmtree(tmpdir)
+
+def fit_evaluate_test():
+    " numpy evaluation of MA, SMA and ISMA fits "
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                        "SP", "aircraft", "prop", "dae51_fitdata.csv")
+    dae51 = FitEvaluator(path)
+    cl, re = np.meshgrid(np.linspace(0.5, 1.4, 50), np.logspace(4.7, 5.8, 40))
+    cd, err = dae51.evaluate(cl, re)
+    cdref = (3.0902e14*cl**-.763161*re**-5.00624
+             + 8.06832e-09*cl**6.32059*re**-0.810816
+             + 2.65501*cl**42.1738*re**-2.87665)**(1/6.1539)
+    assert cd.shape == (40, 50)
+    assert np.allclose(cd, cdref, rtol=1e-3)
+    assert np.allclose(err, 0.09733995717389085*cd)
+    assert dae51.in_bounds(1.0, [1e4, 1e5]).tolist() == [False, True]
+
+    fd = {"K": 2, "d": 1, "ftype": "ISMA", "c1": 2.0, "c2": 0.5,
+          "e11": 1.0, "e21": -1.0, "a1": 1.5, "a2": 3.0}
+    u = np.logspace(-2, 2, 101)
+    w = FitEvaluator(fd)(u)
+    assert np.allclose(2.0*u/w**1.5 + 0.5/u/w**3, 1.0)
+    fd["ftype"] = "MA"
+    assert np.allclose(FitEvaluator(fd)(u), np.maximum(2.0*u, 0.5/u))
+
+def load_fitdata_test():
+    " fit csvs are parsed once; callers get their own picklable copy "
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                        "GP", "aircraft", "wing", "jho_fitdata.csv")
+    fd = load_fitdata(path)
+    assert fd["K"] == 4 and fd["d"] == 2 and fd["ftype"] == "SMA"
+    assert isinstance(fd["K"], int) and isinstance(fd["c0"], float)
+    assert pickle.loads(pickle.dumps(fd)) == fd
+    fd["K"] = 3
+    assert load_fitdata(os.path.relpath(path))["K"] == 4
+
+IMPORT_BUDGET = 3.0  # seconds to import a wing in a fresh interpreter
+
+def import_time_test():
+    " importing component models builds nothing and skips heavy modules "
+    script = "\n".join([
+        "import sys, time",
+        "start = time.time()",
+        "import gpkitmodels",
+        "import gpkitmodels.tools.fitdata",
+        "assert 'gpkit' not in sys.modules",
+        # whatever gpkit and gpfit import themselves is not ours to skip
+        "import gpkit, gpfit.fit_constraintset",
+        "deps = set(sys.modules)",
+        "from gpkitmodels.GP.aircraft.wing.wing import Wing",
+        "print(time.time() - start)",
+        "from gpkitmodels.GP import materials",
+        "assert 'cfrpud' not in vars(materials)",
+        "for heavy in ['pandas', 'matplotlib', 'ad']:",
+        "    assert heavy not in sys.modules or heavy in deps, heavy",
+        "assert materials.cfrpud is Wing.sparModel.material",
+        "from gpkitmodels.GP.materials import *",
+        "assert kevlar is materials.kevlar and 'kevlar' in dir(materials)"])
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        os.pardir, os.pardir)
+    out = subprocess.check_output([sys.executable, "-c", script], cwd=root,
+                                  universal_newlines=True)
+    assert float(out) < IMPORT_BUDGET, "import took %s s" % out.strip()
+
+def benchmark_test():
+    " benchmark a case and flag regressions against a baseline "
+    from gpkitmodels.tools.benchmark import run, compare
+    res = run(["fuselage"], verbosity=0)
+    assert res["fuselage"]["None"]["iterations"] == 1
+    base = {"fuselage": {"None": {"construct": 1e-3, "compile": 1e3,
+                                  "solve": 1e3, "iterations": 1}}}
+    regressions = compare(res, base, min_time=0)
+    assert len(regressions) == 1 and "construct" in regressions[0]
+    assert not compare(res, {"wing": base["fuselage"]})
+
+def spacing_test():
+    " spanwise node distributions "
+    for spacing in ["uniform", "cosine", "sine", "root", ("geometric", 0.8)]:
+        eta = node_spacing(7, spacing)
+        assert eta.shape == (7,) and eta[0] == 0 and np.isclose(eta[-1], 1)
+        assert (np.diff(eta) > 0).all()
+    assert np.diff(node_spacing(7, "sine"))[-1] < 1./6
+    deta = np.diff(node_spacing(5, ("geometric", 0.5)))
+    assert np.allclose(deta[1:]/deta[:-1], 0.5)
+    for bad in [[0, 0.5, 0.4, 1], [0.1, 0.3, 0.6, 1], [0, 1]]:
+        try:
+            node_spacing(4, bad)
+            raise AssertionError("accepted %s" % bad)
+        except ValueError:
+            pass
+    eta = np.linspace(0, 1, 101)
+    nodes = adaptive_spacing(11, eta, np.sqrt(1 - eta**2 + 1e-12))
+    assert nodes[0] == 0 and nodes[-1] == 1
+    assert np.diff(nodes)[-1] < np.diff(nodes)[0]
+
+def richardson_test():
+    " extrapolate grid results to the continuum limit "
+    Ns = np.array([5, 9, 17])
+    h = 1./(Ns - 1)
+    value, error, order = richardson(Ns, 1 + 3*h**2)
+    assert np.isclose(value, 1) and np.isclose(order, 2)
+    assert error > abs(1 + 3*h[-1]**2 - value)
+    value, _, order = richardson(Ns, 2 - h**1.5)
+    assert np.isclose(value, 2) and np.isclose(order, 1.5)
+    value, error, order = richardson(Ns[1:], 1 + h[1:]**2)
+    assert np.isclose(value, 1) and order == 2
+    assert np.isclose(error, 3*h[-1]**2)
+    _, _, order = richardson(Ns, [1., 1.2, 1.1])
+    assert order == 2
+
+def assembly_test():
+    " build wing and propulsor variants on threads without crosstalk "
+    from gpkitmodels.GP.aircraft.wing.wing import Wing
+    from gpkitmodels.GP.aircraft.wing.wing_test import FlightState
+    from gpkitmodels.GP.aircraft.wing.boxspar import BoxSpar
+    from gpkitmodels.GP.aircraft.wing.capspar import CapSpar
+    from gpkitmodels.GP.aircraft.motor.motor import Propulsor
+    from gpkitmodels.GP.aircraft.prop.propeller import Propeller, ActuatorProp
+    from gpkitmodels.SP.aircraft.prop.propeller import BladeElementProp
+
+    def wing(N, spar):
+        "wing with N stations and a spar"
+        return lambda: Wing(N, sparModel=spar)
+
+    def propulsor(flight_model):
+        "propulsor and its performance with a propeller flight model"
+        def builder():
+            "propulsor and performance, built together under the lock"
+            p = Propulsor(prop_flight_model=flight_model)
+            return p, p.flight_model(p, FlightState())
+        return builder
+
+    spars = [CapSpar, BoxSpar]*4
+    Ns = [3 + i % 3 for i in range(len(spars))]
+    wings = build_concurrently([wing(N, s) for N, s in zip(Ns, spars)],
+                               workers=4)
+    for W, N, spar in zip(wings, Ns, spars):
+        assert type(W.spar) is spar and W.spar.I.shape == (N - 1,)
+    assert len(set(W.lineage for W in wings)) == len(wings)
+    props = [ActuatorProp, BladeElementProp]*4
+    built = build_concurrently([propulsor(f) for f in props],
+                               after=lambda pp: type(pp[1].prop), workers=4)
+    assert built == props
+    assert Wing.sparModel is CapSpar
+    assert Propulsor.prop_flight_model is ActuatorProp
+    assert Propeller.flight_model is ActuatorProp
+
+def build_lock_test():
+    " setups that yield to other threads midway still name their variables "
+    import time
+    from gpkit import Model, Variable
+
+    class Slow(Model):
+        "two variables, created either side of a thread switch"
+        def setup(self):
+            x = Variable("x")
+            time.sleep(0.01)  # unlocked, another setup would enter here
+            y = Variable("y")
+            return [x >= 1, y >= x]
+
+    models = build_concurrently([Slow]*8, workers=4)
+    assert len(set(m.lineage for m in models)) == len(models)
+    for m in models:
+        assert all(vk.lineage == m.lineage for vk in m.varkeys)
+
+def rollup_test():
+    " roll weights, CG and inertia up a nested assembly "
+    from gpkit import Model, Variable
+    from gpkitmodels.tools.rollup import RollupIndex
+    from gpkitmodels.tools.summing_constraintset import (SummingConstraintSet,
+                                                         summing_vars)
+
+    class Part(Model):
+        "a weight at a station"
+        def setup(self, W, x):
+            self.W = Variable("W", W, "lbf", "weight")
+            self.x = Variable("x", x, "ft", "station")
+            return []
+
+    class Group(Model):
+        "models without a weight of their own"
+        def setup(self, parts):
+            return parts
+
+    class Assembly(Model):
+        "sums its groups and parts"
+        def setup(self, index):
+            self.W = Variable("W", "lbf", "weight")
+            self.parts = [Group([Part(1, 1), Group([Part(2, 3)])]),
+                          Part(3, 2)]
+            return [SummingConstraintSet(self.W, "W", self.parts,
+                                         index=index, descend=True),
+                    self.parts]
+
+    index = RollupIndex("W")
+    a = Assembly(index)
+    assert len(index.summands(a.parts)) == 3
+    assert len(a[0].summedvars) == 3
+    Ws = summing_vars(a.parts, "W", index)
+    assert [W.key for W in Ws] == [a.parts[1].W.key]
+    assert len(index.already_summed([a])) == 3
+    try:
+        SummingConstraintSet(a.W, "W", a.parts, index=index)
+        descended = True
+    except AssertionError:
+        descended = False
+    assert not descended, "without descend, each model needs its own W"
+    sol = Model(a.W, [a]).solve(verbosity=0)
+    assert abs(sol(a.W).to("lbf").magnitude - 6) < 1e-4
+    res = index.evaluate(sol, a.parts, "x")
+    assert abs(res["cg"].to("ft").magnitude - 13./6) < 1e-4
+    assert abs(res["inertia"].to("lbf*ft^2").magnitude - 17./6) < 1e-4
+    try:
+        index.summands([a, a.parts[1]])
+        raise AssertionError("a part was counted twice")
+    except ValueError:
+        pass
+
+def simpleac_model():
+    " SimPleAC minimizing fuel weight, built in each Monte Carlo worker "
+    from gpkitmodels.SP.SimPleAC.SimPleAC import SimPleAC
+    m = SimPleAC()
+    m.cost = m["W_f"]
+    return m
+
+def monte_carlo_test():
+    " propagate SimPleAC's pr= uncertainties through chunks on disk "
+    from gpkitmodels.tools.monte_carlo import (monte_carlo,
+                                               uncertain_constants, _MODELS)
+    keys, _, pr = uncertain_constants(simpleac_model())
+    assert len(keys) == len(pr) > 10 and min(pr) > 0
+    serial, pooled = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        res = monte_carlo(simpleac_model, 12, serial, {"W": "W"},
+                          chunk_size=5, localsolve=True, workers=1)
+        assert res["n"] == 12 and res["converged"] > 6
+        lo, mid, hi = res["quantiles"]["W"]
+        assert lo <= mid <= hi
+        same = monte_carlo(simpleac_model, 12, pooled, {"W": "W"},
+                           chunk_size=5, localsolve=True, workers=2)
+        for name in ["chunk00000.npz", "chunk00002.npz"]:
+            with np.load(os.path.join(serial, name)) as a, \
+                    np.load(os.path.join(pooled, name)) as b:
+                assert np.array_equal(a["samples"], b["samples"])
+        assert np.allclose(same["quantiles"]["cost"],
+                           res["quantiles"]["cost"])
+        resumed = monte_carlo(simpleac_model, 12, serial, {"W": "W"},
+                              chunk_size=5, localsolve=True, workers=1)
+        assert np.array_equal(resumed["quantiles"]["W"], res["quantiles"]["W"])
+        assert not _MODELS
+        try:
+            monte_carlo(simpleac_model, 12, serial, {"W": "W"}, seed=1,
+                        chunk_size=5, localsolve=True, workers=1)
+            resumed_other_run = True
+        except ValueError:
+            resumed_other_run = False
+        assert not resumed_other_run
+    finally:
+        shutil.rmtree(serial)
+        shutil.rmtree(pooled)
+
+def test():
+    " tests "
+    xfoil_sweep_test()
+    xfoil_session_test()
+    xfoil_cache_test()
+    fit_evaluate_test()
+    load_fitdata_test()
+    import_time_test()
+    benchmark_test()
+    spacing_test()
+    richardson_test()
+    assembly_test()
+    build_lock_test()
+    rollup_test()
+    monte_carlo_test()
+
+if __name__ == "__main__":
+    test()
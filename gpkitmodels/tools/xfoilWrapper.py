@@ -1,113 +1,372 @@
 from __future__ import print_function
 from builtins import range
+from builtins import object
+from collections import OrderedDict
+import multiprocessing
 import subprocess
+import threading
+import select
+import re
+import os
 import numpy as np
-import scipy.optimize as spo
-import math
-import sys
-from gpkit.tests.helpers import NullFile
-
-def blind_call(topline, cl, Re, M, max_iter = 100,
-               pathname = "/usr/local/bin/xfoil"):
-
-    if '.dat' in topline:
-        tl=topline.split()
-        afile=tl[1]
-    if '.txt' in topline:
-        tl=topline.split()
-        afile=tl[1]
-
-    proc = subprocess.Popen([pathname], stdout=subprocess.PIPE, stdin=subprocess.PIPE)
-    proc.stdin.write(topline +
-                     'oper \n' +
-                     "iter %d\n" %(max_iter)+
-                     'visc \n' +
-                     "%.2e \n" %(Re) +
-                     "M \n" +
-                     "%.2f \n" %(M) +
-                     "a 2.0 \n" +
-                     "cl %.4f \n" %(cl) +
-                     '\n' +
-                     'quit \n')
-    stdout_val = proc.communicate()[0]
-    proc.stdin.close()
-
-    if ("VISCAL:  Convergence failed\n" in stdout_val):
-        return stdout_val
+from .xfoil_cache import default_cache
+
+XFOIL_PATH = "/usr/local/bin/xfoil"
+FAILMSG = "VISCAL:  Convergence failed"
+
+def airfoil_topline(airfoil):
+    "returns the xfoil commands that load an airfoil, or None if invalid"
+    if ('.dat' in airfoil) or ('.txt' in airfoil):
+        return 'load ' + airfoil + ' \n afl \n'
+    elif ('naca' == airfoil.lower()[0:4]) and (len(airfoil) == 8):
+        return airfoil + ' \n'
+    return None
+
+def oper_commands(Re, M, max_iter=100):
+    "xfoil commands that enter OPER and set up a viscous run"
+    return ('oper \n' +
+            "iter %d\n" % (max_iter) +
+            'visc \n' +
+            "%.2e \n" % (Re) +
+            "M \n" +
+            "%.2f \n" % (M))
 
+def parse_oper(stdout_val):
+    "returns cd, cl, alpha and cm of the last operating point in the output"
     res = {}
-    if ("VISCAL:  Convergence failed\n" not in stdout_val):
-        ostr = stdout_val.split()
-        ctr = 0
-        for i in range(0,len(ostr)):
-            ix = len(ostr)-(i+1)
-            vl = ostr[ix]
-            if vl in ['a','CL','CD','Cm']:
-                res[vl] = ostr[ix + 2]
-                ctr += 1
-            if ctr >= 4:
-                break
-        cd = res['CD']
-        cl = res['CL']
-        # alpha_ret = res['a']
-        cm = res['Cm']
-        return float(cd), float(cl), float(cm), stdout_val
+    ostr = stdout_val.split()
+    ctr = 0
+    for i in range(0, len(ostr)):
+        ix = len(ostr)-(i+1)
+        vl = ostr[ix]
+        if vl in ['a', 'CL', 'CD', 'Cm'] and vl not in res:
+            res[vl] = ostr[ix + 2]
+            ctr += 1
+        if ctr >= 4:
+            break
+    return float(res['CD']), float(res['CL']), float(res['a']), \
+        float(res['Cm'])
 
-def single_cl(CL, Re = 1e7, M = 0.0, airfoil=[], pathname = "/home/ckarcher/Xfoil/bin/./xfoil",
-                    number_of_samples = 51, sampling_min=-10, sampling_max=20, fitting_fraction = 1.4):
+def run_xfoil(commands, pathname=XFOIL_PATH, timeout=None):
+    """feeds commands to a new xfoil process and returns its output
 
-    num_samples = number_of_samples
-    sample_min=sampling_min
-    sample_max=sampling_max
+    The process is killed and subprocess.TimeoutExpired raised if it has
+    not exited after timeout seconds.
+    """
+    proc = subprocess.Popen([pathname], stdout=subprocess.PIPE,
+                            stdin=subprocess.PIPE, universal_newlines=True)
+    try:
+        return proc.communicate(commands, timeout=timeout)[0]
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        raise
 
-    ls_res = subprocess.check_output(["ls -a"], shell = True)
-    ls = ls_res.split()
+class XfoilSession(object):
+    """long-lived xfoil process with one airfoil loaded, sitting in OPER
 
-    remove_kulfan = False
-    if list(airfoil):
-        if ('.dat' in airfoil) or ('.txt' in airfoil):
-            topline = 'load ' + airfoil + ' \n afl \n'
-        elif ('naca' == airfoil.lower()[0:4]) and (len(airfoil)==8):
-            topline = airfoil + ' \n'
-    else:
-        print("Error: Invalid airfoil passed into XFOIL.  Defaulting to a NACA0012.")
-        topline = 'naca0012 \n'
-
-    initial_list = np.linspace(sample_min,sample_max,num_samples).tolist()
-    cd_calcl = []
-    cl_calcl = []
-    alpha_calcl = []
-    cm_calcl = []
-    for alpha in initial_list:
-        # x = blind_call(topline, alpha, Re, M)
+    Commands are written to stdin one at a time and the output is read back
+    up to the next OPER prompt, so each operating point costs a single
+    command round-trip instead of a process spawn and a geometry load.
+    """
+    PROMPT = re.compile(r"\.OPER\w*\s+c>\s*$")
+
+    def __init__(self, topline, max_iter=100, pathname=XFOIL_PATH,
+                 timeout=None):
+        self.timeout = timeout
+        self.Re = None
+        self.M = None
+        self.lock = threading.Lock()  # held by XfoilSessionPool during I/O
+        # gfortran buffers output to pipes, which would hold back prompts
+        env = dict(os.environ, GFORTRAN_UNBUFFERED_PRECONNECTED="y")
+        self.proc = subprocess.Popen([pathname], stdout=subprocess.PIPE,
+                                     stdin=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT, env=env)
         try:
-            x = blind_call(topline, alpha, Re, M)
+            # only the last of these commands leaves xfoil at an OPER prompt
+            self.command(topline + 'oper')
+            self.command("iter %d" % (max_iter))
         except:
-            x=[1,1]
-        if len(x)==5:
-            cd_calcl.append(x[0])
-            cl_calcl.append(x[1])
-            alpha_calcl.append(x[2])
-            cm_calcl.append(x[3])
-        elif len(x)>10:
-            pass
-
-    cd_calc = np.asarray(cd_calcl)
-    cl_calc = np.asarray(cl_calcl)
-    alpha_calc = np.asarray(alpha_calcl)
-    cm_calc = np.asarray(cm_calcl)
-
-    vldidx = np.where(cl_calc<=max(cl_calc))
-    cd_calc=cd_calc[vldidx[0].tolist()]
-    cl_calc=cl_calc[vldidx[0].tolist()]
-    alpha_calc=alpha_calc[vldidx[0].tolist()]
-    cm_calc=cm_calc[vldidx[0].tolist()]
-
-    vldidx2 = np.where(cl_calc>=0.0)
-    cd_calc=cd_calc[vldidx2[0].tolist()]
-    cl_calc=cl_calc[vldidx2[0].tolist()]
-    alpha_calc=alpha_calc[vldidx2[0].tolist()]
-    cm_calc=cm_calc[vldidx2[0].tolist()]
+            self.close()
+            raise
+
+    def command(self, cmd):
+        "sends cmd and returns the output printed before the next prompt"
+        self.proc.stdin.write((cmd + "\n").encode())
+        self.proc.stdin.flush()
+        fd = self.proc.stdout.fileno()
+        out = b""
+        while not self.PROMPT.search(out[-40:].decode(errors="replace")):
+            if not select.select([fd], [], [], self.timeout)[0]:
+                raise subprocess.TimeoutExpired(cmd, self.timeout)
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                raise OSError("xfoil exited: %s" % out.decode())
+            out += chunk
+        return out.decode(errors="replace")
+
+    def oper(self, cmd, Re, M):
+        "runs an OPER point command (e.g. 'cl 0.5') at Re and M"
+        if Re != self.Re:
+            self.command(("visc %.2e" if self.Re is None else "re %.2e") % Re)
+            self.Re = Re
+        if M != self.M:
+            self.command("mach %.2f" % M)
+            self.M = M
+        stdout_val = self.command(cmd)
+        if FAILMSG in stdout_val:
+            # restart the boundary layer from scratch for the next point
+            self.command("init")
+        return stdout_val
+
+    def close(self):
+        "asks xfoil to quit, killing it if it does not"
+        if self.proc.poll() is None:
+            try:
+                self.proc.communicate(b"\nquit\n", timeout=1)
+            except (subprocess.TimeoutExpired, OSError, ValueError):
+                self.proc.kill()
+                self.proc.communicate()
+
+class XfoilSessionPool(object):
+    """reusable xfoil sessions, one per airfoil
+
+    At most max_sessions idle processes are kept; the least recently used
+    session is closed when a new one is checked in. A call checks its
+    session out under the pool's lock and runs xfoil holding only that
+    session's lock, so threads using different airfoils run in parallel;
+    a thread that finds its airfoil's session checked out starts another.
+    Sessions that time out or die are discarded and restarted on their
+    next call.
+    """
+    def __init__(self, max_sessions=8):
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def oper(self, topline, cmd, Re, M, max_iter, pathname, timeout):
+        "runs an OPER point command in the session for topline"
+        key = (pathname, topline, max_iter)
+        with self.lock:
+            session = self.sessions.pop(key, None)
+        if session is None:
+            session = XfoilSession(topline, max_iter, pathname, timeout)
+        with session.lock:
+            session.timeout = timeout
+            try:
+                stdout_val = session.oper(cmd, Re, M)
+            except:
+                session.close()
+                raise
+        self.checkin(key, session)
+        return stdout_val
+
+    def checkin(self, key, session):
+        "returns a session to the pool, closing any sessions it displaces"
+        with self.lock:
+            if key in self.sessions:
+                stale = [session]
+            else:
+                self.sessions[key] = session
+                stale = []
+                while len(self.sessions) > self.max_sessions:
+                    stale.append(self.sessions.popitem(last=False)[1])
+        for old in stale:
+            with old.lock:
+                old.close()
+
+    def call(self, topline, cl, Re, M, max_iter=100, pathname=XFOIL_PATH,
+             timeout=None):
+        "same as blind_call, in a persistent session"
+        return blind_call(topline, cl, Re, M, max_iter, pathname, timeout,
+                          sessions=self, cache=False)
+
+    def alpha_call(self, topline, alpha, Re, M, max_iter=100,
+                   pathname=XFOIL_PATH, timeout=None):
+        "same as alpha_call, in a persistent session"
+        return alpha_call(topline, alpha, Re, M, max_iter, pathname, timeout,
+                          sessions=self, cache=False)
+
+    def close(self):
+        "closes every idle session"
+        with self.lock:
+            idle = list(self.sessions.values())
+            self.sessions.clear()
+        for session in idle:
+            with session.lock:
+                session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def oper_point(topline, cmd, target, Re, M, max_iter=100,
+               pathname=XFOIL_PATH, timeout=None, sessions=None, cache=None):
+    """runs, or looks up in the cache, one xfoil OPER point
+
+    cmd is "cl" or "a" (alpha); returns (cd, cl, alpha, cm, stdout), or the
+    xfoil output if the point failed to converge. Points run in a session
+    from the sessions pool when one is given. cache defaults to
+    default_cache(); pass False to bypass it. Cached points come back with
+    an empty stdout; failed points are not cached.
+    """
+    cache = default_cache() if cache is None else (cache or None)
+    if cache is not None:
+        key = cache.key(topline, cmd, target, Re, M, max_iter, pathname)
+        hit = cache.get(key)
+        if hit is not None:
+            return hit + ("",)
+
+    pointcmd = "%s %.4f" % (cmd, target)
+    if sessions is not None:
+        stdout_val = sessions.oper(topline, pointcmd, Re, M, max_iter,
+                                   pathname, timeout)
+    else:
+        stdout_val = run_xfoil(topline +
+                               oper_commands(Re, M, max_iter) +
+                               ("a 2.0 \n" if cmd == "cl" else "") +
+                               pointcmd + " \n" +
+                               '\n' +
+                               'quit \n', pathname, timeout)
+
+    if FAILMSG in stdout_val:
+        return stdout_val
+
+    x = parse_oper(stdout_val)
+    if cache is not None:
+        cache.put(key, *x)
+    return x + (stdout_val,)
+
+def blind_call(topline, cl, Re, M, max_iter=100, pathname=XFOIL_PATH,
+               timeout=None, sessions=None, cache=None):
+
+    x = oper_point(topline, "cl", cl, Re, M, max_iter, pathname, timeout,
+                   sessions, cache)
+    if isinstance(x, tuple):
+        return x[0], x[1], x[3], x[4]
+    return x
+
+def alpha_call(topline, alpha, Re, M, max_iter=100, pathname=XFOIL_PATH,
+               timeout=None, sessions=None, cache=None):
+    "like blind_call, but at a fixed angle of attack"
+    return oper_point(topline, "a", alpha, Re, M, max_iter, pathname,
+                      timeout, sessions, cache)
+
+XFOIL_ERRORS = (OSError, subprocess.TimeoutExpired, KeyError, ValueError,
+                IndexError)
+
+def _sweep_job(job):
+    "runs one polar_sweep point, returning nans if xfoil fails"
+    try:
+        x = alpha_call(*job)
+    except XFOIL_ERRORS:
+        x = None
+    if isinstance(x, tuple):
+        return [(x[0], x[1], x[3])]
+    return [(np.nan, np.nan, np.nan)]
+
+def _session_sweep_job(job):
+    "runs a polar_sweep alpha sweep in one xfoil session"
+    topline, alphas, Re, M, max_iter, pathname, timeout, cache = job
+    out = []
+    with XfoilSessionPool(1) as sessions:
+        for alpha in alphas:
+            try:
+                x = alpha_call(topline, alpha, Re, M, max_iter, pathname,
+                               timeout, sessions, cache)
+            except XFOIL_ERRORS:
+                x = None
+            if isinstance(x, tuple):
+                out.append((x[0], x[1], x[3]))
+            else:
+                out.append((np.nan, np.nan, np.nan))
+    return out
+
+def polar_sweep(airfoils, Re, alphas, M=0.0, workers=None, timeout=60.,
+                max_iter=100, pathname=XFOIL_PATH, persistent=True,
+                cache=None):
+    """runs xfoil at every (airfoil, Re, alpha) combination in a process pool
+
+    Arguments
+    ---------
+    airfoils : string or list of strings
+        .dat/.txt files or 4-digit NACA names, as in single_cl
+    Re, alphas : float or array
+        Reynolds numbers and angles of attack [deg] to sweep
+    workers : int
+        size of the process pool; defaults to the number of cpus, 1 runs
+        the sweep serially in this process
+    timeout : float
+        seconds before a single xfoil call is killed
+    persistent : bool
+        if True each (airfoil, Re) alpha sweep runs in one XfoilSession,
+        otherwise every point starts its own xfoil process
+    cache : XfoilCache or False
+        where results are looked up and stored; defaults to default_cache()
+
+    Returns
+    -------
+    cd, cl, cm : arrays of shape (len(airfoils), len(Re), len(alphas));
+        points that did not converge, crashed or timed out are nan
+
+    """
+    if isinstance(airfoils, str):
+        airfoils = [airfoils]
+    Re = np.atleast_1d(Re).astype(float)
+    alphas = np.atleast_1d(alphas).astype(float)
+
+    toplines = []
+    for airfoil in airfoils:
+        topline = airfoil_topline(airfoil)
+        if topline is None:
+            raise ValueError("Invalid airfoil '%s' passed into XFOIL" % airfoil)
+        toplines.append(topline)
+
+    cache = default_cache() if cache is None else cache
+    cache = cache or False
+    if persistent:
+        jobfn = _session_sweep_job
+        jobs = [(topline, alphas, re, M, max_iter, pathname, timeout, cache)
+                for topline in toplines for re in Re]
+    else:
+        jobfn = _sweep_job
+        jobs = [(topline, alpha, re, M, max_iter, pathname, timeout, None,
+                 cache)
+                for topline in toplines for re in Re for alpha in alphas]
+    if workers == 1:
+        results = [jobfn(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(jobfn, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    shape = (len(toplines), len(Re), len(alphas))
+    cd, cl, cm = np.array(sum(results, []), dtype=float).T
+    return cd.reshape(shape), cl.reshape(shape), cm.reshape(shape)
+
+def single_cl(CL, Re = 1e7, M = 0.0, airfoil=[], pathname = "/home/ckarcher/Xfoil/bin/./xfoil",
+                    number_of_samples = 51, sampling_min=-10, sampling_max=20, fitting_fraction = 1.4,
+                    workers=None, timeout=60., persistent=True, cache=None):
+
+    if not list(airfoil) or airfoil_topline(airfoil) is None:
+        print("Error: Invalid airfoil passed into XFOIL.  Defaulting to a NACA0012.")
+        airfoil = 'naca0012'
+
+    alphas = np.linspace(sampling_min, sampling_max, number_of_samples)
+    cd, cl, cm = polar_sweep(airfoil, Re, alphas, M, workers=workers,
+                             timeout=timeout, pathname=pathname,
+                             persistent=persistent, cache=cache)
+
+    vldidx = cl[0, 0] >= 0.0
+    cd_calc = cd[0, 0][vldidx]
+    cl_calc = cl[0, 0][vldidx]
+    alpha_calc = alphas[vldidx]
+    cm_calc = cm[0, 0][vldidx]
 
     p_cd  = np.polyfit(np.append(-cl_calc,cl_calc), np.append(cd_calc,cd_calc),int(len(cl_calc)/fitting_fraction))
     p_alpha = np.polyfit(np.append(-cl_calc,cl_calc), np.append(alpha_calc,alpha_calc),int(len(cl_calc)/fitting_fraction))
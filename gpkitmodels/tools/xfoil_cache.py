@@ -0,0 +1,131 @@
+" on-disk cache of xfoil operating points "
+from builtins import object
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import time
+
+CACHE_ENV = "GPKITMODELS_XFOIL_CACHE"
+
+class XfoilCache(object):
+    """persistent least-recently-used cache of xfoil results
+
+    Entries are keyed by a hash of the airfoil geometry (the contents of the
+    .dat/.txt file, or the NACA designation) together with Re, M and the CL
+    or alpha target, quantized to the precision written to xfoil, and the
+    xfoil executable and iteration limit. Results live in an sqlite file
+    shared between processes, fronted by an in-process dictionary; when the
+    file holds more than max_entries points the least recently used ones
+    are evicted. Points that failed to converge are not stored, so they
+    are retried on every call.
+    """
+    def __init__(self, path, max_entries=200000):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self._geometry = {}
+        self._db = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {"path": self.path, "max_entries": self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def db(self):
+        "sqlite connection, reopened in forked processes"
+        if self._db is None or self._pid != os.getpid():
+            dirname = os.path.dirname(os.path.abspath(self.path))
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            self._db = sqlite3.connect(self.path, timeout=60)
+            self._db.execute("CREATE TABLE IF NOT EXISTS points (key TEXT "
+                             "PRIMARY KEY, cd REAL, cl REAL, alpha REAL, "
+                             "cm REAL, atime REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS points_atime "
+                             "ON points (atime)")
+            self._pid = os.getpid()
+        return self._db
+
+    def geometry_hash(self, topline):
+        "hash of the airfoil loaded by an xfoil topline"
+        words = topline.split()
+        if words and words[0].lower() == "load":
+            fname = words[1]
+            stat = os.stat(fname)
+            gkey = (os.path.abspath(fname), stat.st_mtime, stat.st_size)
+            if gkey not in self._geometry:
+                with open(fname, "rb") as f:
+                    self._geometry[gkey] = hashlib.sha1(f.read()).hexdigest()
+            return self._geometry[gkey]
+        return hashlib.sha1(" ".join(words).lower().encode()).hexdigest()
+
+    def key(self, topline, mode, target, Re, M, max_iter, pathname):
+        "cache key for a 'cl' or 'a' (alpha) target"
+        return "%s|%s %.4f|%.2e|%.2f|%d|%s" % (
+            self.geometry_hash(topline), mode, target, Re, M, max_iter,
+            os.path.abspath(pathname))
+
+    def get(self, key):
+        "(cd, cl, alpha, cm) for key, or None if not cached"
+        if key in self.memory:
+            self.memory[key] = self.memory.pop(key)
+            return self.memory[key]
+        with self.db:
+            row = self.db.execute("SELECT cd, cl, alpha, cm FROM "
+                                  "points WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE points SET atime=? WHERE key=?",
+                            (time.time(), key))
+        self._remember(key, tuple(row))
+        return self.memory[key]
+
+    def put(self, key, cd, cl, alpha, cm):
+        "stores a result, evicting the least recently used if full"
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO points VALUES "
+                            "(?, ?, ?, ?, ?, ?)", (key, cd, cl, alpha, cm,
+                                                   time.time()))
+            n = self.db.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+            if n > self.max_entries:
+                self.db.execute("DELETE FROM points WHERE key IN (SELECT key "
+                                "FROM points ORDER BY atime LIMIT ?)",
+                                (n - self.max_entries,))
+        self._remember(key, (cd, cl, alpha, cm))
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def clear(self):
+        "empties the cache"
+        with self.db:
+            self.db.execute("DELETE FROM points")
+        self.memory.clear()
+
+    def size(self):
+        "number of points stored on disk"
+        return self.db.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+
+_DEFAULT = []
+
+def default_cache():
+    """the shared cache, stored at $GPKITMODELS_XFOIL_CACHE or under
+    ~/.cache/gpkitmodels; setting that variable to an empty string disables
+    it and returns None"""
+    path = os.environ.get(CACHE_ENV)
+    if path is None:
+        path = os.path.join(os.path.expanduser("~"), ".cache", "gpkitmodels",
+                            "xfoil_cache.sqlite")
+    if not path:
+        return None
+    for cache in _DEFAULT:
+        if cache.path == path:
+            return cache
+    _DEFAULT[:] = [XfoilCache(path)]
+    return _DEFAULT[0]
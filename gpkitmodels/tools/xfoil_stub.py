@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""stand-in for the xfoil executable, used to test the xfoil wrappers
+
+Understands the subset of the XFOIL command language that xfoilWrapper
+sends (load, naca, oper, iter, visc, re, mach, a, cl, init, quit) and
+answers with XFOIL-formatted operating point output from a thin airfoil
+polar. Setting XFOIL_STUB_HANG to an angle of attack makes the stub hang
+when asked for that point; any |alpha| above 15 deg fails to converge.
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+import math
+
+FAIL_ALPHA = 15.0
+
+
+def oper_point(alpha, re, mach):
+    "thin airfoil polar with a Reynolds-dependent profile drag bucket"
+    beta = math.sqrt(1 - mach**2)
+    cl = 2*math.pi*0.9*math.radians(alpha)/beta
+    cd = 0.0055*(re/1e6)**-0.2 + 0.008*cl**2
+    cm = -0.05 - 0.002*alpha
+    return cl, cd, cm
+
+
+class StubXfoil(object):
+    "line-oriented emulation of an interactive XFOIL session"
+    def __init__(self):
+        self.menu = "XFOIL"
+        self.pending = None
+        self.re = 0.0
+        self.mach = 0.0
+        self.visc = False
+        self.hang = os.environ.get("XFOIL_STUB_HANG")
+
+    def prompt(self):
+        if self.pending:
+            sys.stdout.write(" Enter %s   r>  " % self.pending)
+        elif self.menu == "OPER":
+            sys.stdout.write(".OPER%s   c>  " % ("v" if self.visc else "i"))
+        else:
+            sys.stdout.write(" XFOIL   c>  ")
+        sys.stdout.flush()
+
+    def point(self, alpha):
+        if self.hang is not None and abs(alpha - float(self.hang)) < 1e-3:
+            while True:
+                time.sleep(1)
+        if abs(alpha) > FAIL_ALPHA:
+            print(" VISCAL:  Convergence failed")
+            return
+        cl, cd, cm = oper_point(alpha, self.re or 1e6, self.mach)
+        print("       a =  %.3f      CL =  %.4f" % (alpha, cl))
+        print("      Cm = %.4f     CD =  %.5f   =>   CDf =  %.5f    CDp ="
+              "  %.5f" % (cm, cd, 0.6*cd, 0.4*cd))
+
+    def command(self, line):
+        words = line.split()
+        if self.pending:
+            value = float(words[0]) if words else 0.0
+            if self.pending == "Reynolds number":
+                self.re, self.visc = value, True
+            else:
+                self.mach = value
+            self.pending = None
+            return True
+        if not words:
+            self.menu = "XFOIL"
+            return True
+        cmd, args = words[0].lower(), words[1:]
+        if cmd == "quit":
+            return False
+        if self.menu == "XFOIL":
+            if cmd == "oper":
+                self.menu = "OPER"
+            elif cmd == "load" and args and not os.path.isfile(args[0]):
+                print(" File OPEN error:  %s" % args[0])
+        elif cmd in ["visc", "v", "re"]:
+            if args:
+                self.re, self.visc = float(args[0]), True
+            else:
+                self.pending = "Reynolds number"
+        elif cmd in ["m", "mach"]:
+            if args:
+                self.mach = float(args[0])
+            else:
+                self.pending = "Mach number"
+        elif cmd == "a":
+            self.point(float(args[0]))
+        elif cmd == "cl":
+            cl = float(args[0])
+            beta = math.sqrt(1 - self.mach**2)
+            self.point(math.degrees(cl*beta/(2*math.pi*0.9)))
+        return True
+
+    def run(self):
+        print(" XFOIL stub")
+        self.prompt()
+        for line in iter(sys.stdin.readline, ""):
+            if not self.command(line):
+                break
+            self.prompt()
+
+
+if __name__ == "__main__":
+    StubXfoil().run()